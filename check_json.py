@@ -1,108 +1,414 @@
+import copy
+import functools
+import hashlib
 import json
+import mmap
 import os
+import re
+import sys
+from itertools import islice
 
-def check_json_file(json_file='pbix_analysis/complete_analysis.json'):
-    """Diagnose what's in your JSON file."""
+# Prefer a faster JSON decoder when one is installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    _fast_loads = orjson.loads
+else:
+    try:
+        import rapidjson
+        _fast_loads = rapidjson.loads
+    except ImportError:
+        try:
+            import ujson
+            _fast_loads = ujson.loads
+        except ImportError:
+            _fast_loads = None
+
+# A run of 19+ digits may be an integer beyond 64 bits, which the fast
+# decoders round or reject
+_LONG_DIGITS = re.compile(rb'[0-9]{19,}')
+
+
+def _loads(data):
+    """Decode JSON bytes, agreeing with json.loads on what is valid.
+    
+    Input the fast decoder rejects (NaN/Infinity, lone surrogates) or might
+    round (big integers) is decoded by the stdlib instead.
+    """
+    if _fast_loads is not None and _LONG_DIGITS.search(data) is None:
+        try:
+            return _fast_loads(data)
+        except ValueError:
+            pass
+    return json.loads(bytes(data))
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    import simdjson
+except ImportError:
+    simdjson = None
+
+
+# Report banner lines
+_BAR = "=" * 80
+_DASH = "-" * 80
+
+# On-disk cache of diagnostic summaries, keyed by (absolute path, mtime, size)
+_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'pbiextractor', 'check_json')
+# Bump whenever the summary dict changes shape, so older cache entries are ignored
+_CACHE_VERSION = 2
+
+# Keys of the summary dict built by _summarize() and _stream_summary()
+_SUMMARY_FIELDS = frozenset((
+    'path', 'top_keys', 'has_dataModel', 'data_model_keys',
+    'n_tables', 'n_relationships', 'n_roles', 'sample_table_names',
+))
+
+
+def _cache_file(key):
+    """Path of the cached summary for a (path, mtime_ns, size) key."""
+    digest = hashlib.sha1(repr((_CACHE_VERSION, key)).encode('utf-8')).hexdigest()
+    return os.path.join(_CACHE_DIR, f'{digest}.json')
+
+
+def _read_cached_summary(key):
+    """Return the cached summary for key, or None on a miss.
+    
+    Anything unreadable or not shaped like a current summary counts as a miss.
+    """
+    try:
+        with open(_cache_file(key), 'rb') as f:
+            summary = json.loads(f.read())
+    except (OSError, ValueError):
+        return None
+    if not isinstance(summary, dict) or summary.keys() != _SUMMARY_FIELDS:
+        return None
+    return summary
+
+
+def _write_cached_summary(key, summary):
+    """Persist a summary; failures only cost the next run a re-parse."""
+    try:
+        os.makedirs(_CACHE_DIR, exist_ok=True)
+        with open(_cache_file(key), 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False)
+    except (OSError, TypeError, ValueError):
+        pass
+
+
+def _read_bytes(path):
+    """Read a whole file as bytes.
     
-    print("=" * 80)
-    print("JSON FILE DIAGNOSTIC")
-    print("=" * 80)
-    print(f"Checking: {json_file}\n")
+    The file is opened unbuffered so read() becomes a single readall()
+    sized from fstat, instead of a series of 8 KiB buffered reads.
+    """
+    with open(path, 'rb', buffering=0) as f:
+        return f.read()
+
+
+def _load_json(path):
+    """Read a JSON file and decode it with the fastest available parser.
     
-    if not os.path.exists(json_file):
-        print(f"❌ File not found: {json_file}")
-        print("\nPossible solutions:")
-        print("1. Make sure you ran the PBIX parser first")
-        print("2. Check the file path is correct")
-        print("3. The parser creates: pbix_analysis/complete_analysis.json")
+    orjson can decode straight from a memory-mapped view of the file,
+    which avoids copying the whole document into a bytes object first.
+    """
+    if orjson is not None:
+        with open(path, 'rb') as f:
+            try:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty files cannot be mapped; let the decoder report them
+                return _loads(b'')
+            with mm, memoryview(mm) as view:
+                return _loads(view)
+    return _loads(_read_bytes(path))
+
+
+def _shape_scan(raw, path):
+    """Summarize through simdjson's lazy proxies, so only the fields read are materialised."""
+    parser = simdjson.Parser()
+    return _summarize(parser.parse(raw), path)
+
+
+def _summarize(data, path):
+    """Collect the fields the diagnostic reports on from a fully loaded document."""
+    summary = {
+        'path': path,
+        'top_keys': list(data.keys()),
+        'has_dataModel': 'dataModel' in data,
+        'data_model_keys': [],
+        'n_tables': 0,
+        'n_relationships': 0,
+        'n_roles': 0,
+        'sample_table_names': []
+    }
+    
+    if summary['has_dataModel']:
+        dm = data['dataModel']
+        summary['data_model_keys'] = list(dm.keys())
+        tables = dm.get('tables') or []
+        summary['n_tables'] = len(tables)
+        summary['n_relationships'] = len(dm.get('relationships') or [])
+        summary['n_roles'] = len(dm.get('roles') or [])
+        summary['sample_table_names'] = [table.get('name', 'Unknown') for table in islice(tables, 5)]
+    
+    return summary
+
+
+# Formatters for dataModel keys whose item count is reported next to the key name
+_DM_HANDLERS = {
+    'tables': lambda summary: f"  ✓ tables: {summary['n_tables']} tables",
+    'relationships': lambda summary: f"  ✓ relationships: {summary['n_relationships']} relationships",
+    'roles': lambda summary: f"  ✓ roles: {summary['n_roles']} roles"
+}
+
+# ijson prefixes whose array items are counted by the streaming summary
+_STREAM_COUNTERS = {
+    'dataModel.tables.item': 'n_tables',
+    'dataModel.relationships.item': 'n_relationships',
+    'dataModel.roles.item': 'n_roles'
+}
+_STREAM_VALUE_EVENTS = {'start_map', 'start_array', 'string', 'number', 'boolean', 'null'}
+
+
+def _stream_summary(path, size):
+    """Build the same summary as _summarize() with ijson, without materialising the document."""
+    summary = {
+        'path': path,
+        'top_keys': [],
+        'has_dataModel': False,
+        'data_model_keys': [],
+        'n_tables': 0,
+        'n_relationships': 0,
+        'n_roles': 0,
+        'sample_table_names': []
+    }
+    samples = summary['sample_table_names']
+    
+    # Size ijson's read chunk to the file instead of the 8 KiB default
+    buf_size = min(max(size, 65536), 1 << 20)
+    with open(path, 'rb', buffering=0) as f:
+        for prefix, event, value in ijson.parse(f, buf_size=buf_size):
+            if event == 'map_key':
+                if prefix == '':
+                    summary['top_keys'].append(value)
+                    if value == 'dataModel':
+                        summary['has_dataModel'] = True
+                elif prefix == 'dataModel':
+                    summary['data_model_keys'].append(value)
+            elif prefix in _STREAM_COUNTERS and event in _STREAM_VALUE_EVENTS:
+                summary[_STREAM_COUNTERS[prefix]] += 1
+                # Placeholder until the table's name (if any) is seen
+                if prefix == 'dataModel.tables.item' and len(samples) < 5:
+                    samples.append('Unknown')
+            elif prefix == 'dataModel.tables.item.name' and summary['n_tables'] <= 5:
+                samples[-1] = value
+    
+    return summary
+
+
+@functools.lru_cache(maxsize=32)
+def _load_summary(path, mtime_ns, size, fast):
+    """Return (summary, from_disk_cache) for a file version, memoized in-process.
+    
+    mtime_ns and size are part of the cache key so an edited file is
+    re-parsed rather than served stale.
+    """
+    cache_key = (path, mtime_ns, size)
+    summary = _read_cached_summary(cache_key)
+    if summary is not None:
+        return summary, True
+    
+    summary = None
+    if fast:
+        # A fast scanner may reject files the stdlib accepts (e.g. NaN);
+        # those get the full decode below, which decides validity
+        try:
+            if simdjson is not None:
+                summary = _shape_scan(_read_bytes(path), path)
+            elif ijson is not None:
+                summary = _stream_summary(path, size)
+        except Exception:
+            summary = None
+    if summary is None:
+        summary = _summarize(_load_json(path), path)
+    
+    _write_cached_summary(cache_key, summary)
+    return summary, False
+
+
+def _write_lines(lines):
+    """Write buffered report lines to stdout in one call."""
+    sys.stdout.write("\n".join(lines) + "\n")
+
+
+def quick_check_json_file(json_file='pbix_analysis/complete_analysis.json'):
+    """Confirm the file exists and looks like a JSON object, without parsing it.
+    
+    Only the size and the first/last 4 KiB are read.
+    """
+    out = []
+    out.append(_BAR)
+    out.append("JSON FILE QUICK CHECK")
+    out.append(_BAR)
+    out.append(f"Checking: {json_file}\n")
+    
+    # Any unreadable path (missing, no permission, not a file) is reported as not found
+    try:
+        st = os.stat(json_file)
+        with open(json_file, 'rb') as f:
+            head = f.read(4096)
+            f.seek(max(st.st_size - 4096, 0))
+            tail = f.read()
+    except OSError:
+        out.append(f"❌ File not found: {json_file}")
+        _write_lines(out)
         return
     
+    head = head.lstrip(b'\xef\xbb\xbf \t\r\n')
+    tail = tail.rstrip(b' \t\r\n')
+    
+    out.append(f"Size: {st.st_size:,} bytes")
+    if head.startswith(b'{') and tail.endswith(b'}'):
+        out.append("✅ Looks like a JSON object (starts with '{' and ends with '}')")
+    else:
+        out.append("⚠️  Does not look like a complete JSON object")
+        out.append("   Run without --summary for a full diagnostic")
+    
+    out.append("\n" + _BAR)
+    _write_lines(out)
+
+
+def check_json_file(json_file='pbix_analysis/complete_analysis.json', fast=False):
+    """Diagnose what's in your JSON file.
+    
+    Returns the summary dict (top-level keys, dataModel keys, table /
+    relationship / role counts and sample table names) so callers can
+    reuse it instead of parsing the file again, or None if the file is
+    missing or unreadable.
+    
+    With fast=True the full decode is skipped: simdjson (if installed)
+    materialises only the fields the report reads, otherwise ijson (if
+    installed) streams the file so memory use stays flat.
+    """
+    out = []
+    out.append(_BAR)
+    out.append("JSON FILE DIAGNOSTIC")
+    out.append(_BAR)
+    out.append(f"Checking: {json_file}\n")
+    
     try:
-        with open(json_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        st = os.stat(json_file)
+    except OSError:
+        out.append(f"❌ File not found: {json_file}")
+        out.append("\nPossible solutions:")
+        out.append("1. Make sure you ran the PBIX parser first")
+        out.append("2. Check the file path is correct")
+        out.append("3. The parser creates: pbix_analysis/complete_analysis.json")
+        _write_lines(out)
+        return None
+    
+    try:
+        summary, from_disk_cache = _load_summary(os.path.abspath(json_file), st.st_mtime_ns, st.st_size, fast)
     except Exception as e:
-        print(f"❌ Error reading JSON: {e}")
-        return
+        out.append(f"❌ Error reading JSON: {e}")
+        _write_lines(out)
+        return None
+    
+    if from_disk_cache:
+        out.append("✅ JSON file unchanged since last check (using cached summary)\n")
+    else:
+        out.append("✅ JSON file loaded successfully\n")
     
-    print("✅ JSON file loaded successfully\n")
-    print("=" * 80)
-    print("WHAT'S IN YOUR FILE:")
-    print("=" * 80)
+    out.append(_BAR)
+    out.append("WHAT'S IN YOUR FILE:")
+    out.append(_BAR)
     
     # Check top-level keys
-    print("\nTop-level sections found:")
-    for key in data.keys():
-        print(f"  ✓ {key}")
+    out.append("\nTop-level sections found:")
+    out.extend(f"  ✓ {key}" for key in summary['top_keys'])
     
     # Check for dataModel
-    if 'dataModel' in data:
-        print("\n✅ GOOD NEWS: 'dataModel' section EXISTS!")
+    if summary['has_dataModel']:
+        out.append("\n✅ GOOD NEWS: 'dataModel' section EXISTS!")
         
-        dm = data['dataModel']
-        print("\nData Model contains:")
-        for key in dm.keys():
-            if key == 'tables':
-                print(f"  ✓ {key}: {len(dm[key])} tables")
-            elif key == 'relationships':
-                print(f"  ✓ {key}: {len(dm[key])} relationships")
-            elif key == 'roles':
-                print(f"  ✓ {key}: {len(dm[key])} roles")
-            else:
-                print(f"  ✓ {key}")
+        out.append("\nData Model contains:")
+        for key in summary['data_model_keys']:
+            handler = _DM_HANDLERS.get(key)
+            out.append(handler(summary) if handler else f"  ✓ {key}")
         
         # Check if tables have data
-        if dm.get('tables'):
-            print(f"\n✅ You have {len(dm['tables'])} tables - READY TO ANALYZE!")
-            print("\nSample table names:")
-            for i, table in enumerate(dm['tables'][:5]):
-                print(f"  • {table.get('name', 'Unknown')}")
-            if len(dm['tables']) > 5:
-                print(f"  ... and {len(dm['tables']) - 5} more")
+        n_tables = summary['n_tables']
+        if n_tables:
+            out.append(f"\n✅ You have {n_tables} tables - READY TO ANALYZE!")
+            out.append("\nSample table names:")
+            for name in summary['sample_table_names']:
+                out.append(f"  • {name}")
+            if n_tables > 5:
+                out.append(f"  ... and {n_tables - 5} more")
         else:
-            print("\n⚠️  WARNING: 'tables' list is empty")
+            out.append("\n⚠️  WARNING: 'tables' list is empty")
     
     else:
-        print("\n❌ PROBLEM: No 'dataModel' section found!")
-        print("\nThis means:")
-        print("  • Your PBIX is in an older format (pre-2020)")
-        print("  • OR the DataModelSchema file was missing")
+        out.append("\n❌ PROBLEM: No 'dataModel' section found!")
+        out.append("\nThis means:")
+        out.append("  • Your PBIX is in an older format (pre-2020)")
+        out.append("  • OR the DataModelSchema file was missing")
         
-        print("\n" + "=" * 80)
-        print("SOLUTIONS:")
-        print("=" * 80)
+        out.append("\n" + _BAR)
+        out.append("SOLUTIONS:")
+        out.append(_BAR)
         
         # Check what else is available
-        if 'reportLayout' in data:
-            print("\n✓ You DO have: Report Layout (pages and visuals)")
-        if 'connections' in data:
-            print("✓ You DO have: Data Connections")
-        if 'metadata' in data:
-            print("✓ You DO have: Metadata")
+        if 'reportLayout' in summary['top_keys']:
+            out.append("\n✓ You DO have: Report Layout (pages and visuals)")
+        if 'connections' in summary['top_keys']:
+            out.append("✓ You DO have: Data Connections")
+        if 'metadata' in summary['top_keys']:
+            out.append("✓ You DO have: Metadata")
         
-        print("\n📋 RECOMMENDED ACTIONS:")
-        print("-" * 80)
-        print("\nOption 1: Convert PBIX to PBIT")
-        print("  1. Open your PBIX in Power BI Desktop")
-        print("  2. File → Save As → Template (.pbit)")
-        print("  3. Run the parser on the PBIT file instead")
+        out.append("\n📋 RECOMMENDED ACTIONS:")
+        out.append(_DASH)
+        out.append("\nOption 1: Convert PBIX to PBIT")
+        out.append("  1. Open your PBIX in Power BI Desktop")
+        out.append("  2. File → Save As → Template (.pbit)")
+        out.append("  3. Run the parser on the PBIT file instead")
         
-        print("\nOption 2: Use pbi-tools (if available)")
-        print("  1. Ask your developer to run: pbi-tools extract yourfile.pbix")
-        print("  2. Send you the extracted folder")
-        print("  3. Point the analysis script to that folder")
+        out.append("\nOption 2: Use pbi-tools (if available)")
+        out.append("  1. Ask your developer to run: pbi-tools extract yourfile.pbix")
+        out.append("  2. Send you the extracted folder")
+        out.append("  3. Point the analysis script to that folder")
         
-        print("\nOption 3: Analyze what you DO have")
-        print("  I can create a script to analyze just the report layout,")
-        print("  connections, and metadata (without the data model)")
+        out.append("\nOption 3: Analyze what you DO have")
+        out.append("  I can create a script to analyze just the report layout,")
+        out.append("  connections, and metadata (without the data model)")
     
-    print("\n" + "=" * 80)
+    out.append("\n" + _BAR)
+    _write_lines(out)
+    
+    # Copy so callers cannot mutate the memoized summary
+    return copy.deepcopy(summary)
 
 if __name__ == '__main__':
-    import sys
+    import argparse
     
-    # Allow command line argument
-    json_file = 'pbix_analysis/complete_analysis.json'
-    if len(sys.argv) > 1:
-        json_file = sys.argv[1]
+    arg_parser = argparse.ArgumentParser(description="Diagnose what's in a PBIX analysis JSON file.")
+    arg_parser.add_argument('json_file', nargs='?', default='pbix_analysis/complete_analysis.json',
+                            help='JSON file produced by the PBIX parser')
+    arg_parser.add_argument('--fast', action='store_true',
+                            help='skip the full JSON decode (uses simdjson or ijson if installed)')
+    arg_parser.add_argument('-s', '--summary', action='store_true',
+                            help='only check that the file exists and looks like a JSON object')
+    args = arg_parser.parse_args()
     
-    check_json_file(json_file)
\ No newline at end of file
+    if args.summary:
+        quick_check_json_file(args.json_file)
+    else:
+        check_json_file(args.json_file, fast=args.fast)
@@ -9,13 +9,97 @@ This script generates:
 5. All DAX Formulas Export
 """
 
+import io
 import json
-import pandas as pd
 import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from html import escape
 from datetime import datetime
 from collections import defaultdict
 import re
 
+# orjson parses the model several times faster than the stdlib decoder,
+# pysimdjson is the next best choice
+try:
+    import orjson
+    _fast_loads = orjson.loads
+except ImportError:
+    try:
+        import simdjson
+        _fast_loads = simdjson.loads
+    except ImportError:
+        _fast_loads = None
+
+# A run of 19+ digits may be an integer beyond 64 bits, which orjson rounds
+# to a float and simdjson rejects
+_LONG_DIGITS = re.compile(rb'[0-9]{19,}')
+
+def _loads(data):
+    """Decode JSON bytes with the fast parser, or json.loads where it falls short.
+    
+    Input the fast parsers reject but the stdlib accepts (NaN/Infinity,
+    lone surrogates, big integers) is decoded by the json module.
+    """
+    if _fast_loads is not None and _LONG_DIGITS.search(data) is None:
+        try:
+            return _fast_loads(data)
+        except (ValueError, RuntimeError):
+            pass
+    return json.loads(data)
+
+# xlsxwriter writes the workbook directly; pandas + openpyxl is the fallback
+try:
+    import xlsxwriter
+except ImportError:
+    xlsxwriter = None
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+# DAX object references: 'Table'[Name], Table[Name] or [Name]
+_DAX_REFERENCE_RE = re.compile(
+    r"'([^']+)'\s*\[\s*([^\]]+?)\s*\]"
+    r"|([^\W\d]\w*)\s*\[\s*([^\]]+?)\s*\]"
+    r"|\[\s*([^\]]+?)\s*\]"
+)
+
+# Report rules
+_EQ80 = "=" * 80 + "\n"
+_DASH80 = "-" * 80 + "\n"
+
+# Reports are many small writes; a 1 MiB buffer keeps them to a few syscalls
+_WRITE_BUFFER = 1 << 20
+
+# Display folder -> file name: path separators and drive colons become '_'
+_SAFE_FILENAME = str.maketrans({'/': '_', '\\': '_', ':': '_'})
+
+# HTML anchor ids for tables: spaces -> '_', quotes and brackets dropped
+_SLUG = str.maketrans({' ': '_', "'": None, '[': None, ']': None})
+
+# HTML badges, precomputed for every flag combination
+_HIDDEN_BADGE = '<span class="badge badge-hidden">HIDDEN</span>'
+_CALC_BADGE = '<span class="badge badge-calculated">CALCULATED</span>'
+_KEY_BADGE = '<span class="badge badge-key">KEY</span>'
+_HIDDEN_BADGES = {False: '', True: _HIDDEN_BADGE}
+_COLUMN_BADGES = {
+    (hidden, calc, key): (_HIDDEN_BADGE if hidden else '') + (_CALC_BADGE if calc else '') + (_KEY_BADGE if key else '')
+    for hidden in (False, True) for calc in (False, True) for key in (False, True)
+}
+# isActive -> (symbol, css class)
+_RELATIONSHIP_STYLES = {True: ('✓', 'relationship rel-active'), False: ('✗', 'relationship')}
+
+def _write_text_file(path, content):
+    """Write a finished report to disk in one call."""
+    with open(path, 'w', encoding='utf-8', buffering=_WRITE_BUFFER) as f:
+        f.write(content)
+
+def _h(value):
+    """HTML-escape a model value for interpolation into the documentation."""
+    return escape(value if value.__class__ is str else str(value))
+
 class PowerBIAnalyzer:
     """Comprehensive Power BI model analyzer."""
     
@@ -23,6 +107,15 @@ class PowerBIAnalyzer:
         self.json_file = json_file
         self.output_dir = output_dir
         self.data = None
+        # One timestamp shared by every report of a run; run_all() retakes it
+        self._set_run_time()
+        # (id(obj), key) -> normalized expression; objects stay alive in self.data
+        self._expr_cache = {}
+        # Flat lookups built once by _index_model, for the self.data it indexed
+        self._indexed_data = None
+        self.table_names = []
+        self.measures_by_name = {}
+        self.columns_by_qualified_name = {}
         
         # Create output directory
         os.makedirs(output_dir, exist_ok=True)
@@ -30,18 +123,26 @@ class PowerBIAnalyzer:
     # ========== FIX: ADD THIS NEW METHOD ==========
     def _safe_get_expression(self, obj, key='expression'):
         """Safely get expression - handle both string and list."""
+        cache_key = (id(obj), key)
+        cached = self._expr_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         expr = obj.get(key, '')
         
-        # Handle different expression formats
-        if isinstance(expr, list):
+        # Handle different expression formats (decoded JSON has exact types)
+        if expr.__class__ is str:
+            result = expr
+        elif expr.__class__ is list:
             # If it's a list, join with newlines
-            return '\n'.join(str(item) for item in expr)
-        elif isinstance(expr, str):
-            return expr
+            result = '\n'.join(map(str, expr))
         elif expr is None:
-            return ''
+            result = ''
         else:
-            return str(expr)
+            result = str(expr)
+        
+        self._expr_cache[cache_key] = result
+        return result
     # ==============================================
     
     def load_data(self):
@@ -57,16 +158,54 @@ class PowerBIAnalyzer:
             return False
         
         try:
-            with open(self.json_file, 'r', encoding='utf-8') as f:
-                self.data = json.load(f)
+            with open(self.json_file, 'rb') as f:
+                self.data = _loads(f.read())
+            self._expr_cache.clear()
+            self._index_model()
             print("✓ JSON file loaded successfully\n")
             return True
         except Exception as e:
             print(f"❌ Error reading JSON file: {e}")
             return False
     
+    def _index_model(self):
+        """Walk the tables once and build the flat name lookups."""
+        self.table_names = []
+        self.measures_by_name = {}
+        self.columns_by_qualified_name = {}
+        self._indexed_data = self.data
+        
+        for table in self.data.get('dataModel', {}).get('tables', []):
+            table_name = table['name']
+            self.table_names.append(table_name)
+            
+            for col in table.get('columns', []):
+                self.columns_by_qualified_name[f"{table_name}[{col['name']}]"] = {
+                    'table': table_name,
+                    'name': col['name']
+                }
+            
+            for measure in table.get('measures', []):
+                self.measures_by_name[measure['name']] = {
+                    'table': table_name,
+                    'expression': self._safe_get_expression(measure, 'expression'),
+                    'displayFolder': measure.get('displayFolder', '')
+                }
+    
+    def _ensure_index(self):
+        """Index self.data if it was set or replaced without going through load_data()."""
+        if self.data is not None and self._indexed_data is not self.data:
+            self._expr_cache.clear()
+            self._index_model()
+    
+    def _set_run_time(self):
+        """Stamp the reports written from now on with the current time."""
+        self._run_time = datetime.now()
+        self._timestamp = self._run_time.strftime('%Y-%m-%d %H:%M:%S')
+    
     def run_all(self):
         """Run all analyses."""
+        self._set_run_time()
         if not self.load_data():
             return
         
@@ -76,27 +215,51 @@ class PowerBIAnalyzer:
         
         print("Running all analyses...\n")
         
-        self.create_data_dictionary()
-        self.create_html_documentation()
-        self.analyze_dax_dependencies()
-        self.validate_model()
-        self.export_all_dax_formulas()
+        # The analyses only read self.data and write separate files, so run them
+        # concurrently; each one logs into its own list, printed in order.
+        stages = [
+            self.create_data_dictionary,
+            self.create_html_documentation,
+            self.analyze_dax_dependencies,
+            self.validate_model,
+            self.export_all_dax_formulas,
+        ]
+        def run(stage, lines):
+            def log(*args):
+                lines.append(' '.join(map(str, args)) + '\n')
+            try:
+                stage(log)
+            except Exception as e:
+                return e
+            return None
         
-        print("\n" + "=" * 80)
-        print("✅ ALL ANALYSES COMPLETE!")
-        print("=" * 80)
-        print(f"\nAll output files are in: {self.output_dir}/")
-        print("\nGenerated files:")
-        for file in os.listdir(self.output_dir):
-            if os.path.isfile(os.path.join(self.output_dir, file)):
-                size = os.path.getsize(os.path.join(self.output_dir, file))
-                print(f"   • {file} ({size:,} bytes)")
+        logs = [[] for _ in stages]
+        with ThreadPoolExecutor(max_workers=len(stages)) as executor:
+            errors = list(executor.map(run, stages, logs))
+        
+        sys.stdout.write(''.join([line for lines in logs for line in lines]))
+        for error in errors:
+            if error is not None:
+                raise error
+        
+        lines = [
+            "\n" + "=" * 80,
+            "✅ ALL ANALYSES COMPLETE!",
+            "=" * 80,
+            f"\nAll output files are in: {self.output_dir}/",
+            "\nGenerated files:",
+        ]
+        with os.scandir(self.output_dir) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    lines.append(f"   • {entry.name} ({entry.stat().st_size:,} bytes)")
+        print("\n".join(lines))
     
-    def create_data_dictionary(self):
+    def create_data_dictionary(self, log=print):
         """Generate Excel data dictionary."""
-        print("=" * 80)
-        print("1. CREATING DATA DICTIONARY (EXCEL)")
-        print("=" * 80)
+        log("=" * 80)
+        log("1. CREATING DATA DICTIONARY (EXCEL)")
+        log("=" * 80)
         
         output_file = os.path.join(self.output_dir, 'Data_Dictionary.xlsx')
         
@@ -107,31 +270,25 @@ class PowerBIAnalyzer:
         hierarchies_list = []
         roles_list = []
         
-        # Process Tables
-        print("📊 Processing Tables...")
+        # Process Tables, Columns, Measures and Hierarchies in one walk of the tables
+        log("📊 Processing Tables...\n"
+            "📋 Processing Columns...\n"
+            "📈 Processing Measures...\n"
+            "📐 Processing Hierarchies...")
         for table in self.data['dataModel'].get('tables', []):
-            total_columns = len(table.get('columns', []))
-            visible_columns = sum(1 for col in table.get('columns', []) if not col.get('isHidden', False))
-            calculated_columns = sum(1 for col in table.get('columns', []) if col.get('expression'))
+            table_name = table['name']
+            columns = table.get('columns', [])
+            measures = table.get('measures', [])
+            hierarchies = table.get('hierarchies', [])
             
-            tables_list.append({
-                'Table Name': table['name'],
-                'Description': table.get('description', ''),
-                'Is Hidden': 'Yes' if table.get('isHidden', False) else 'No',
-                'Total Columns': total_columns,
-                'Visible Columns': visible_columns,
-                'Calculated Columns': calculated_columns,
-                'Measures': len(table.get('measures', [])),
-                'Hierarchies': len(table.get('hierarchies', []))
-            })
-        
-        # Process Columns
-        print("📋 Processing Columns...")
-        for table in self.data['dataModel'].get('tables', []):
-            for col in table.get('columns', []):
+            # Count columns while building their rows
+            visible_columns = 0
+            calculated_columns = 0
+            
+            for col in columns:
                 # ========== FIX: USE SAFE EXPRESSION GETTER ==========
                 columns_list.append({
-                    'Table': table['name'],
+                    'Table': table_name,
                     'Column Name': col['name'],
                     'Data Type': col.get('dataType', ''),
                     'Source Column': col.get('sourceColumn', ''),
@@ -147,14 +304,24 @@ class PowerBIAnalyzer:
                     'Display Folder': col.get('displayFolder', '')
                 })
                 # =====================================================
-        
-        # Process Measures
-        print("📈 Processing Measures...")
-        for table in self.data['dataModel'].get('tables', []):
-            for measure in table.get('measures', []):
+                visible_columns += not col.get('isHidden', False)
+                calculated_columns += bool(col.get('expression'))
+            
+            tables_list.append({
+                'Table Name': table_name,
+                'Description': table.get('description', ''),
+                'Is Hidden': 'Yes' if table.get('isHidden', False) else 'No',
+                'Total Columns': len(columns),
+                'Visible Columns': visible_columns,
+                'Calculated Columns': calculated_columns,
+                'Measures': len(measures),
+                'Hierarchies': len(hierarchies)
+            })
+            
+            for measure in measures:
                 # ========== FIX: USE SAFE EXPRESSION GETTER ==========
                 measures_list.append({
-                    'Table': table['name'],
+                    'Table': table_name,
                     'Measure Name': measure['name'],
                     'Display Folder': measure.get('displayFolder', ''),
                     'Format String': measure.get('formatString', ''),
@@ -163,9 +330,19 @@ class PowerBIAnalyzer:
                     'Description': measure.get('description', '')
                 })
                 # =====================================================
+            
+            for hierarchy in hierarchies:
+                levels = ' → '.join([level['name'] for level in hierarchy.get('levels', [])])
+                hierarchies_list.append({
+                    'Table': table_name,
+                    'Hierarchy Name': hierarchy['name'],
+                    'Is Hidden': 'Yes' if hierarchy.get('isHidden', False) else 'No',
+                    'Level Count': len(hierarchy.get('levels', [])),
+                    'Levels': levels
+                })
         
         # Process Relationships
-        print("🔗 Processing Relationships...")
+        log("🔗 Processing Relationships...")
         for rel in self.data['dataModel'].get('relationships', []):
             relationships_list.append({
                 'Relationship Name': rel.get('name', ''),
@@ -181,21 +358,8 @@ class PowerBIAnalyzer:
                 'Security Filtering': rel.get('securityFilteringBehavior', '')
             })
         
-        # Process Hierarchies
-        print("📐 Processing Hierarchies...")
-        for table in self.data['dataModel'].get('tables', []):
-            for hierarchy in table.get('hierarchies', []):
-                levels = ' → '.join([level['name'] for level in hierarchy.get('levels', [])])
-                hierarchies_list.append({
-                    'Table': table['name'],
-                    'Hierarchy Name': hierarchy['name'],
-                    'Is Hidden': 'Yes' if hierarchy.get('isHidden', False) else 'No',
-                    'Level Count': len(hierarchy.get('levels', [])),
-                    'Levels': levels
-                })
-        
         # Process Security Roles
-        print("🔒 Processing Security Roles...")
+        log("🔒 Processing Security Roles...")
         for role in self.data['dataModel'].get('roles', []):
             for perm in role.get('tablePermissions', []):
                 # ========== FIX: USE SAFE EXPRESSION GETTER ==========
@@ -220,39 +384,65 @@ class PowerBIAnalyzer:
         summary_data.append({'Metric': 'Calculated Columns', 'Value': summary_stats.get('totalCalculatedColumns', 0)})
         summary_data.append({'Metric': 'Calculated Tables', 'Value': summary_stats.get('totalCalculatedTables', 0)})
         summary_data.append({'Metric': 'Security Roles', 'Value': summary_stats.get('totalRoles', 0)})
-        summary_data.append({'Metric': 'Generated On', 'Value': datetime.now().strftime('%Y-%m-%d %H:%M:%S')})
+        summary_data.append({'Metric': 'Generated On', 'Value': self._timestamp})
         
         # Create Excel
         try:
-            with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
-                if summary_data:
-                    pd.DataFrame(summary_data).to_excel(writer, sheet_name='Summary', index=False)
-                if tables_list:
-                    pd.DataFrame(tables_list).to_excel(writer, sheet_name='Tables', index=False)
-                if columns_list:
-                    pd.DataFrame(columns_list).to_excel(writer, sheet_name='Columns', index=False)
-                if measures_list:
-                    pd.DataFrame(measures_list).to_excel(writer, sheet_name='Measures', index=False)
-                if relationships_list:
-                    pd.DataFrame(relationships_list).to_excel(writer, sheet_name='Relationships', index=False)
-                if hierarchies_list:
-                    pd.DataFrame(hierarchies_list).to_excel(writer, sheet_name='Hierarchies', index=False)
-                if roles_list:
-                    pd.DataFrame(roles_list).to_excel(writer, sheet_name='Security Roles', index=False)
+            self._write_excel(output_file, [
+                ('Summary', summary_data),
+                ('Tables', tables_list),
+                ('Columns', columns_list),
+                ('Measures', measures_list),
+                ('Relationships', relationships_list),
+                ('Hierarchies', hierarchies_list),
+                ('Security Roles', roles_list),
+            ])
             
-            print(f"✅ Data Dictionary created: {output_file}\n")
+            log(f"✅ Data Dictionary created: {output_file}\n")
         except Exception as e:
-            print(f"❌ Error creating Excel: {e}\n")
+            log(f"❌ Error creating Excel: {e}\n")
+    
+    def _write_excel(self, output_file, sheets):
+        """Write (sheet_name, rows) pairs to an Excel file, skipping empty sheets."""
+        if xlsxwriter is None:
+            with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
+                for sheet_name, rows in sheets:
+                    if rows:
+                        pd.DataFrame(rows).to_excel(writer, sheet_name=sheet_name, index=False)
+            return
+        
+        # Rows are written strictly in order, so constant_memory can flush each
+        # one to disk. Keep DAX that starts with '=' or contains URLs as text.
+        workbook = xlsxwriter.Workbook(output_file, {
+            'constant_memory': True,
+            'strings_to_formulas': False,
+            'strings_to_urls': False,
+        })
+        try:
+            header_format = workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
+            for sheet_name, rows in sheets:
+                if not rows:
+                    continue
+                worksheet = workbook.add_worksheet(sheet_name)
+                headers = list(rows[0])
+                worksheet.write_row(0, 0, headers, header_format)
+                for row_num, row in enumerate(rows, 1):
+                    worksheet.write_row(row_num, 0, [row.get(h) for h in headers])
+        finally:
+            workbook.close()
     
-    def create_html_documentation(self):
+    def create_html_documentation(self, log=print):
         """Generate interactive HTML documentation."""
-        print("=" * 80)
-        print("2. CREATING HTML DOCUMENTATION")
-        print("=" * 80)
+        log("=" * 80)
+        log("2. CREATING HTML DOCUMENTATION")
+        log("=" * 80)
         
         output_file = os.path.join(self.output_dir, 'Model_Documentation.html')
         
-        html = """<!DOCTYPE html>
+        parts = []
+        W = parts.append
+        
+        W("""<!DOCTYPE html>
 <html>
 <head>
     <meta charset="UTF-8">
@@ -454,188 +644,181 @@ class PowerBIAnalyzer:
 <body>
     <div class="header">
         <h1>📊 Power BI Model Documentation</h1>
-        <p>Generated on """ + datetime.now().strftime('%B %d, %Y at %H:%M:%S') + """</p>
+        <p>Generated on """ + self._run_time.strftime('%B %d, %Y at %H:%M:%S') + """</p>
     </div>
     
     <div class="container">
-"""
+""")
         
         # Statistics
         if 'dataModel' in self.data:
             summary = self.data['dataModel'].get('summary', {})
-            html += """
+            W(f"""
         <div class="stats">
             <div class="stat-box">
-                <div class="stat-number">{}</div>
+                <div class="stat-number">{summary.get('totalTables', 0)}</div>
                 <div class="stat-label">Tables</div>
             </div>
             <div class="stat-box">
-                <div class="stat-number">{}</div>
+                <div class="stat-number">{summary.get('totalMeasures', 0)}</div>
                 <div class="stat-label">Measures</div>
             </div>
             <div class="stat-box">
-                <div class="stat-number">{}</div>
+                <div class="stat-number">{summary.get('totalRelationships', 0)}</div>
                 <div class="stat-label">Relationships</div>
             </div>
             <div class="stat-box">
-                <div class="stat-number">{}</div>
+                <div class="stat-number">{summary.get('totalCalculatedColumns', 0)}</div>
                 <div class="stat-label">Calculated Columns</div>
             </div>
         </div>
-""".format(
-                summary.get('totalTables', 0),
-                summary.get('totalMeasures', 0),
-                summary.get('totalRelationships', 0),
-                summary.get('totalCalculatedColumns', 0)
-            )
+""")
             
             # Navigation
-            html += '<div class="nav"><h3>📑 Quick Navigation</h3><div class="nav-links">'
+            W('<div class="nav"><h3>📑 Quick Navigation</h3><div class="nav-links">')
+            table_ids = {}
             for table in self.data['dataModel'].get('tables', []):
-                table_id = table['name'].replace(' ', '_').replace("'", "").replace('[', '').replace(']', '')
-                html += f'<a href="#{table_id}" class="nav-link">{table["name"]}</a>'
-            html += '</div></div>'
+                table_id = table_ids[table['name']] = table['name'].translate(_SLUG)
+                W(f'<a href="#{_h(table_id)}" class="nav-link">{_h(table["name"])}</a>')
+            W('</div></div>')
             
             # Tables Section
-            html += '<div class="section"><h2>📋 Tables and Columns</h2>'
+            W('<div class="section"><h2>📋 Tables and Columns</h2>')
             
             for table in self.data['dataModel'].get('tables', []):
-                table_id = table['name'].replace(' ', '_').replace("'", "").replace('[', '').replace(']', '')
-                hidden_badge = '<span class="badge badge-hidden">HIDDEN</span>' if table.get('isHidden') else ''
+                table_id = table_ids[table['name']]
+                hidden_badge = _HIDDEN_BADGES[bool(table.get('isHidden'))]
                 
-                html += f'<div class="table-card" id="{table_id}">'
-                html += f'<div class="table-name">{table["name"]}{hidden_badge}</div>'
+                W(f'<div class="table-card" id="{_h(table_id)}">')
+                W(f'<div class="table-name">{_h(table["name"])}{hidden_badge}</div>')
                 
                 if table.get('description'):
-                    html += f'<p class="table-meta"><em>{table["description"]}</em></p>'
+                    W(f'<p class="table-meta"><em>{_h(table["description"])}</em></p>')
                 
                 col_count = len(table.get('columns', []))
                 meas_count = len(table.get('measures', []))
-                html += f'<div class="table-meta">{col_count} columns • {meas_count} measures</div>'
+                W(f'<div class="table-meta">{col_count} columns • {meas_count} measures</div>')
                 
                 # Columns
                 if table.get('columns'):
-                    html += '<div class="subsection"><h4>Columns</h4>'
+                    W('<div class="subsection"><h4>Columns</h4>')
                     for col in table['columns']:
-                        hidden_badge = '<span class="badge badge-hidden">HIDDEN</span>' if col.get('isHidden') else ''
-                        calc_badge = '<span class="badge badge-calculated">CALCULATED</span>' if col.get('expression') else ''
-                        key_badge = '<span class="badge badge-key">KEY</span>' if col.get('isKey') else ''
+                        is_calculated = bool(col.get('expression'))
+                        badges = _COLUMN_BADGES[bool(col.get('isHidden')), is_calculated, bool(col.get('isKey'))]
                         
-                        item_class = 'item calculated' if col.get('expression') else 'item'
+                        item_class = 'item calculated' if is_calculated else 'item'
                         
-                        html += f'<div class="{item_class}">'
-                        html += f'<div class="item-name">{col["name"]}{hidden_badge}{calc_badge}{key_badge}</div>'
-                        html += f'<div class="item-detail">Type: <code>{col.get("dataType", "N/A")}</code>'
+                        W(f'<div class="{item_class}">')
+                        W(f'<div class="item-name">{_h(col["name"])}{badges}</div>')
+                        W(f'<div class="item-detail">Type: <code>{_h(col.get("dataType", "N/A"))}</code>')
                         
                         if col.get('formatString'):
-                            html += f' • Format: <code>{col["formatString"]}</code>'
+                            W(f' • Format: <code>{_h(col["formatString"])}</code>')
                         if col.get('dataCategory'):
-                            html += f' • Category: {col["dataCategory"]}'
+                            W(f' • Category: {_h(col["dataCategory"])}')
                         
-                        html += '</div>'
+                        W('</div>')
                         
                         if col.get('description'):
-                            html += f'<div class="item-detail">{col["description"]}</div>'
+                            W(f'<div class="item-detail">{_h(col["description"])}</div>')
                         
                         # ========== FIX: USE SAFE EXPRESSION GETTER ==========
                         expr = self._safe_get_expression(col, 'expression')
                         if expr:
-                            html += f'<div class="dax">{expr}</div>'
+                            W(f'<div class="dax">{_h(expr)}</div>')
                         # =====================================================
                         
-                        html += '</div>'
-                    html += '</div>'
+                        W('</div>')
+                    W('</div>')
                 
                 # Measures
                 if table.get('measures'):
-                    html += '<div class="subsection"><h4>Measures</h4>'
+                    W('<div class="subsection"><h4>Measures</h4>')
                     for measure in table['measures']:
-                        hidden_badge = '<span class="badge badge-hidden">HIDDEN</span>' if measure.get('isHidden') else ''
+                        hidden_badge = _HIDDEN_BADGES[bool(measure.get('isHidden'))]
                         
-                        html += '<div class="item measure">'
-                        html += f'<div class="item-name">{measure["name"]}{hidden_badge}</div>'
+                        W('<div class="item measure">')
+                        W(f'<div class="item-name">{_h(measure["name"])}{hidden_badge}</div>')
                         
                         details = []
                         if measure.get('displayFolder'):
-                            details.append(f'Folder: {measure["displayFolder"]}')
+                            details.append(f'Folder: {_h(measure["displayFolder"])}')
                         if measure.get('formatString'):
-                            details.append(f'Format: <code>{measure["formatString"]}</code>')
+                            details.append(f'Format: <code>{_h(measure["formatString"])}</code>')
                         
                         if details:
-                            html += f'<div class="item-detail">{" • ".join(details)}</div>'
+                            W(f'<div class="item-detail">{" • ".join(details)}</div>')
                         
                         if measure.get('description'):
-                            html += f'<div class="item-detail">{measure["description"]}</div>'
+                            W(f'<div class="item-detail">{_h(measure["description"])}</div>')
                         
                         # ========== FIX: USE SAFE EXPRESSION GETTER ==========
                         expr = self._safe_get_expression(measure, 'expression')
                         if expr:
-                            html += f'<div class="dax">{expr}</div>'
+                            W(f'<div class="dax">{_h(expr)}</div>')
                         # =====================================================
                         
-                        html += '</div>'
-                    html += '</div>'
+                        W('</div>')
+                    W('</div>')
                 
                 # Hierarchies
                 if table.get('hierarchies'):
-                    html += '<div class="subsection"><h4>Hierarchies</h4>'
+                    W('<div class="subsection"><h4>Hierarchies</h4>')
                     for hier in table['hierarchies']:
-                        html += f'<div class="item">'
-                        html += f'<div class="item-name">{hier["name"]}</div>'
-                        html += '<div class="item-detail">Levels: '
-                        levels = [f'{level["name"]}' for level in hier.get('levels', [])]
-                        html += ' → '.join(levels)
-                        html += '</div></div>'
-                    html += '</div>'
+                        W(f'<div class="item">')
+                        W(f'<div class="item-name">{_h(hier["name"])}</div>')
+                        W('<div class="item-detail">Levels: ')
+                        levels = [_h(level["name"]) for level in hier.get('levels', [])]
+                        W(' → '.join(levels))
+                        W('</div></div>')
+                    W('</div>')
                 
-                html += '</div>'
+                W('</div>')
             
-            html += '</div>'
+            W('</div>')
             
             # Relationships Section
             if self.data['dataModel'].get('relationships'):
-                html += '<div class="section"><h2>🔗 Relationships</h2>'
+                W('<div class="section"><h2>🔗 Relationships</h2>')
                 for rel in self.data['dataModel']['relationships']:
-                    is_active = rel.get('isActive', True)
-                    active_symbol = '✓' if is_active else '✗'
-                    rel_class = 'relationship rel-active' if is_active else 'relationship'
+                    active_symbol, rel_class = _RELATIONSHIP_STYLES[bool(rel.get('isActive', True))]
                     
-                    html += f'<div class="{rel_class}">'
-                    html += f'<strong>{active_symbol} {rel["fromTable"]}[{rel["fromColumn"]}]</strong> → '
-                    html += f'<strong>{rel["toTable"]}[{rel["toColumn"]}]</strong><br>'
-                    html += f'<div class="item-detail">'
-                    html += f'Cardinality: {rel.get("fromCardinality", "?")}:{rel.get("toCardinality", "?")} • '
-                    html += f'Cross-filter: {rel.get("crossFilteringBehavior", "N/A")}'
-                    html += '</div></div>'
-                html += '</div>'
+                    W(f'<div class="{rel_class}">')
+                    W(f'<strong>{active_symbol} {_h(rel["fromTable"])}[{_h(rel["fromColumn"])}]</strong> → ')
+                    W(f'<strong>{_h(rel["toTable"])}[{_h(rel["toColumn"])}]</strong><br>')
+                    W(f'<div class="item-detail">')
+                    W(f'Cardinality: {_h(rel.get("fromCardinality", "?"))}:{_h(rel.get("toCardinality", "?"))} • ')
+                    W(f'Cross-filter: {_h(rel.get("crossFilteringBehavior", "N/A"))}')
+                    W('</div></div>')
+                W('</div>')
             
             # Security Roles
             if self.data['dataModel'].get('roles'):
-                html += '<div class="section"><h2>🔒 Security Roles (RLS)</h2>'
+                W('<div class="section"><h2>🔒 Security Roles (RLS)</h2>')
                 for role in self.data['dataModel']['roles']:
-                    html += '<div class="table-card">'
-                    html += f'<div class="table-name">{role["name"]}</div>'
+                    W('<div class="table-card">')
+                    W(f'<div class="table-name">{_h(role["name"])}</div>')
                     if role.get('description'):
-                        html += f'<p class="table-meta"><em>{role["description"]}</em></p>'
+                        W(f'<p class="table-meta"><em>{_h(role["description"])}</em></p>')
                     
                     if role.get('tablePermissions'):
-                        html += '<div class="subsection"><h4>Table Permissions</h4>'
+                        W('<div class="subsection"><h4>Table Permissions</h4>')
                         for perm in role['tablePermissions']:
-                            html += '<div class="item">'
-                            html += f'<div class="item-name">Table: {perm["name"]}</div>'
+                            W('<div class="item">')
+                            W(f'<div class="item-name">Table: {_h(perm["name"])}</div>')
                             
                             # ========== FIX: USE SAFE EXPRESSION GETTER ==========
                             expr = self._safe_get_expression(perm, 'filterExpression')
                             if expr:
-                                html += f'<div class="dax">{expr}</div>'
+                                W(f'<div class="dax">{_h(expr)}</div>')
                             # =====================================================
                             
-                            html += '</div>'
-                        html += '</div>'
-                    html += '</div>'
-                html += '</div>'
+                            W('</div>')
+                        W('</div>')
+                    W('</div>')
+                W('</div>')
         
-        html += """
+        W("""
         <div class="footer">
             <p>📊 Power BI Model Documentation</p>
             <p>Generated by Power BI Analysis Toolkit</p>
@@ -643,49 +826,42 @@ class PowerBIAnalyzer:
     </div>
 </body>
 </html>
-"""
+""")
         
         try:
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(html)
-            print(f"✅ HTML Documentation created: {output_file}\n")
+            with open(output_file, 'w', encoding='utf-8', buffering=_WRITE_BUFFER) as f:
+                f.write(''.join(parts))
+            log(f"✅ HTML Documentation created: {output_file}\n")
         except Exception as e:
-            print(f"❌ Error creating HTML: {e}\n")
+            log(f"❌ Error creating HTML: {e}\n")
     
-    def analyze_dax_dependencies(self):
+    def analyze_dax_dependencies(self, log=print):
         """Analyze DAX dependencies between measures."""
-        print("=" * 80)
-        print("3. ANALYZING DAX DEPENDENCIES")
-        print("=" * 80)
+        log("=" * 80)
+        log("3. ANALYZING DAX DEPENDENCIES")
+        log("=" * 80)
         
         output_file = os.path.join(self.output_dir, 'DAX_Dependencies.txt')
         output_file_reverse = os.path.join(self.output_dir, 'DAX_Reverse_Dependencies.txt')
         
-        # Build object lists
-        all_tables = set()
-        all_columns = {}
-        all_measures = {}
+        self._ensure_index()
+        all_measures = self.measures_by_name
         
-        for table in self.data['dataModel'].get('tables', []):
-            table_name = table['name']
-            all_tables.add(table_name)
-            all_columns[table_name] = [col['name'] for col in table.get('columns', [])]
-            
-            for measure in table.get('measures', []):
-                # ========== FIX: USE SAFE EXPRESSION GETTER ==========
-                all_measures[measure['name']] = {
-                    'table': table_name,
-                    'expression': self._safe_get_expression(measure, 'expression'),
-                    'displayFolder': measure.get('displayFolder', '')
-                }
-                # =====================================================
+        log(f"📊 Analyzing {len(all_measures)} measures...")
         
-        print(f"📊 Analyzing {len(all_measures)} measures...")
+        # Map reference text (case-insensitive) back to the model's names
+        tables_by_lower = {table.lower(): table for table in self.table_names}
+        columns_by_lower = {(col['table'].lower(), col['name'].lower()): qualified_name
+                            for qualified_name, col in self.columns_by_qualified_name.items()}
+        measures_by_lower = {measure.lower(): measure for measure in all_measures}
         
-        # Analyze dependencies
+        # Analyze dependencies in name order; reverse dependencies are collected
+        # alongside, so every reverse list comes out already sorted
         dependencies = {}
+        reverse_deps = defaultdict(list)
         
-        for measure_name, measure_info in all_measures.items():
+        for measure_name in sorted(all_measures):
+            measure_info = all_measures[measure_name]
             dax = measure_info['expression']
             deps = {
                 'tables_used': set(),
@@ -693,25 +869,30 @@ class PowerBIAnalyzer:
                 'measures_used': set()
             }
             
-            # Find table references
-            for table in all_tables:
-                pattern1 = rf'\b{re.escape(table)}\s*\['
-                pattern2 = rf"'{re.escape(table)}'\s*\["
-                if re.search(pattern1, dax, re.IGNORECASE) or re.search(pattern2, dax, re.IGNORECASE):
+            # One pass over the lowercased expression; each reference is
+            # resolved by dict lookup against the lowercased names
+            names = set()
+            for match in _DAX_REFERENCE_RE.finditer(dax.lower()):
+                quoted_table, quoted_col, bare_table, bare_col, bracketed = match.groups()
+                
+                if bracketed is not None:
+                    names.add(bracketed)
+                    continue
+                
+                table_key = quoted_table if quoted_table is not None else bare_table
+                name = quoted_col if quoted_table is not None else bare_col
+                names.add(name)
+                
+                table = tables_by_lower.get(table_key)
+                if table is not None:
                     deps['tables_used'].add(table)
-                    
-                    for col in all_columns.get(table, []):
-                        col_pattern1 = rf'\b{re.escape(table)}\s*\[\s*{re.escape(col)}\s*\]'
-                        col_pattern2 = rf"'{re.escape(table)}'\s*\[\s*{re.escape(col)}\s*\]"
-                        if re.search(col_pattern1, dax, re.IGNORECASE) or re.search(col_pattern2, dax, re.IGNORECASE):
-                            deps['columns_used'].add(f"{table}[{col}]")
+                    col = columns_by_lower.get((table_key, name))
+                    if col is not None:
+                        deps['columns_used'].add(col)
             
-            # Find measure references
-            for other_measure in all_measures.keys():
-                if other_measure != measure_name:
-                    pattern = rf'\[\s*{re.escape(other_measure)}\s*\]'
-                    if re.search(pattern, dax, re.IGNORECASE):
-                        deps['measures_used'].add(other_measure)
+            # Any [Name] may be a measure, qualified or not
+            deps['measures_used'] = {measures_by_lower[name] for name in names & measures_by_lower.keys()}
+            deps['measures_used'].discard(measure_name)
             
             dependencies[measure_name] = {
                 'table': measure_info['table'],
@@ -720,82 +901,92 @@ class PowerBIAnalyzer:
                 'columns': sorted(deps['columns_used']),
                 'measures': sorted(deps['measures_used'])
             }
+            for used_measure in deps['measures_used']:
+                reverse_deps[used_measure].append(measure_name)
         
         # Save forward dependencies
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write("=" * 80 + "\n")
-            f.write("DAX MEASURE DEPENDENCIES ANALYSIS\n")
-            f.write("What does each measure depend on?\n")
-            f.write("=" * 80 + "\n\n")
-            
-            for measure_name in sorted(dependencies.keys()):
-                deps = dependencies[measure_name]
-                f.write(f"\n📊 {measure_name}\n")
-                f.write(f"   Table: {deps['table']}\n")
-                if deps['displayFolder']:
-                    f.write(f"   Folder: {deps['displayFolder']}\n")
-                
-                if deps['tables']:
-                    f.write(f"   Uses Tables: {', '.join(deps['tables'])}\n")
-                if deps['columns']:
-                    f.write(f"   Uses Columns:\n")
-                    for col in deps['columns']:
-                        f.write(f"      • {col}\n")
-                if deps['measures']:
-                    f.write(f"   Uses Measures:\n")
-                    for meas in deps['measures']:
-                        f.write(f"      • {meas}\n")
-        
-        # Create reverse dependencies
-        reverse_deps = defaultdict(list)
+        buf = io.StringIO()
+        w = buf.write
+        w(_EQ80)
+        w("DAX MEASURE DEPENDENCIES ANALYSIS\n")
+        w("What does each measure depend on?\n")
+        w(_EQ80 + "\n")
+        
         for measure_name, deps in dependencies.items():
-            for used_measure in deps['measures']:
-                reverse_deps[used_measure].append(measure_name)
+            w(f"\n📊 {measure_name}\n")
+            w(f"   Table: {deps['table']}\n")
+            if deps['displayFolder']:
+                w(f"   Folder: {deps['displayFolder']}\n")
+            
+            if deps['tables']:
+                w(f"   Uses Tables: {', '.join(deps['tables'])}\n")
+            if deps['columns']:
+                w("   Uses Columns:\n      • " + "\n      • ".join(deps['columns']) + "\n")
+            if deps['measures']:
+                w("   Uses Measures:\n      • " + "\n      • ".join(deps['measures']) + "\n")
+        
+        with open(output_file, 'w', encoding='utf-8', buffering=_WRITE_BUFFER) as f:
+            f.write(buf.getvalue())
         
         # Save reverse dependencies
-        with open(output_file_reverse, 'w', encoding='utf-8') as f:
-            f.write("=" * 80 + "\n")
-            f.write("DAX REVERSE DEPENDENCIES\n")
-            f.write("What depends on each measure? (Impact Analysis)\n")
-            f.write("=" * 80 + "\n\n")
-            
-            for measure_name in sorted(reverse_deps.keys()):
-                f.write(f"\n📊 {measure_name}\n")
-                f.write(f"   Used by {len(reverse_deps[measure_name])} measure(s):\n")
-                for dependent in sorted(reverse_deps[measure_name]):
-                    f.write(f"      • {dependent}\n")
-            
-            # List measures not used by any other measure
-            unused_measures = set(all_measures.keys()) - set(reverse_deps.keys())
-            if unused_measures:
-                f.write(f"\n\n{'=' * 80}\n")
-                f.write(f"LEAF MEASURES (not used by other measures): {len(unused_measures)}\n")
-                f.write("=" * 80 + "\n")
-                for measure in sorted(unused_measures):
-                    f.write(f"   • {measure}\n")
-        
-        print(f"✅ DAX Dependencies analyzed:")
-        print(f"   📄 {output_file}")
-        print(f"   📄 {output_file_reverse}\n")
+        buf = io.StringIO()
+        w = buf.write
+        w(_EQ80)
+        w("DAX REVERSE DEPENDENCIES\n")
+        w("What depends on each measure? (Impact Analysis)\n")
+        w(_EQ80 + "\n")
+        
+        for measure_name in sorted(reverse_deps.keys()):
+            dependents = reverse_deps[measure_name]
+            w(f"\n📊 {measure_name}\n")
+            w(f"   Used by {len(dependents)} measure(s):\n")
+            w("      • " + "\n      • ".join(dependents) + "\n")
+        
+        # List measures not used by any other measure
+        unused_measures = all_measures.keys() - reverse_deps.keys()
+        if unused_measures:
+            w("\n\n" + _EQ80)
+            w(f"LEAF MEASURES (not used by other measures): {len(unused_measures)}\n")
+            w(_EQ80)
+            w("   • " + "\n   • ".join(sorted(unused_measures)) + "\n")
+        
+        with open(output_file_reverse, 'w', encoding='utf-8', buffering=_WRITE_BUFFER) as f:
+            f.write(buf.getvalue())
+        
+        log(f"✅ DAX Dependencies analyzed:\n"
+            f"   📄 {output_file}\n"
+            f"   📄 {output_file_reverse}\n")
     
-    def validate_model(self):
+    def validate_model(self, log=print):
         """Validate the model for common issues."""
-        print("=" * 80)
-        print("4. VALIDATING MODEL")
-        print("=" * 80)
+        log("=" * 80)
+        log("4. VALIDATING MODEL")
+        log("=" * 80)
         
         output_file = os.path.join(self.output_dir, 'Model_Validation.txt')
         
         issues = []
         warnings = []
         
-        # Check for tables without relationships
+        dm = self.data['dataModel']
+        rels = dm.get('relationships', [])
+        
+        # One pass over relationships: connected tables and the relationship counts
         tables_with_rels = set()
-        for rel in self.data['dataModel'].get('relationships', []):
+        active_count = inactive_count = bidir_count = many_to_many_count = 0
+        for rel in rels:
             tables_with_rels.add(rel['fromTable'])
             tables_with_rels.add(rel['toTable'])
+            if rel.get('isActive', True):
+                active_count += 1
+            else:
+                inactive_count += 1
+            if rel.get('crossFilteringBehavior') == 'bothDirections':
+                bidir_count += 1
+            if rel.get('fromCardinality') == 'many' and rel.get('toCardinality') == 'many':
+                many_to_many_count += 1
         
-        for table in self.data['dataModel'].get('tables', []):
+        for table in dm.get('tables', []):
             table_name = table['name']
             
             # Orphaned tables
@@ -806,10 +997,18 @@ class PowerBIAnalyzer:
             if not table.get('columns') and not table.get('measures'):
                 issues.append(f"❌ Table '{table_name}' has no columns or measures")
             
+            # One pass over the columns for both column checks
+            calc_cols = 0
+            visible_cols = 0
+            for col in table.get('columns') or ():
+                if col.get('expression'):
+                    calc_cols += 1
+                if not col.get('isHidden'):
+                    visible_cols += 1
+            
             # Too many calculated columns
-            calc_cols = [col for col in table.get('columns', []) if col.get('expression')]
-            if len(calc_cols) > 5:
-                warnings.append(f"⚠️  Table '{table_name}' has {len(calc_cols)} calculated columns (consider measures for better performance)")
+            if calc_cols > 5:
+                warnings.append(f"⚠️  Table '{table_name}' has {calc_cols} calculated columns (consider measures for better performance)")
             
             # Measures without format strings
             for measure in table.get('measures', []):
@@ -817,37 +1016,30 @@ class PowerBIAnalyzer:
                     warnings.append(f"⚠️  Measure '{table_name}[{measure['name']}]' has no format string")
             
             # Hidden tables with visible columns
-            if table.get('isHidden'):
-                visible_cols = [col for col in table.get('columns', []) if not col.get('isHidden')]
-                if visible_cols:
-                    warnings.append(f"⚠️  Hidden table '{table_name}' has {len(visible_cols)} visible columns")
+            if table.get('isHidden') and visible_cols:
+                warnings.append(f"⚠️  Hidden table '{table_name}' has {visible_cols} visible columns")
         
         # Check relationships
-        inactive_rels = [rel for rel in self.data['dataModel'].get('relationships', []) if not rel.get('isActive', True)]
-        if inactive_rels:
-            warnings.append(f"⚠️  {len(inactive_rels)} inactive relationship(s) found")
+        if inactive_count:
+            warnings.append(f"⚠️  {inactive_count} inactive relationship(s) found")
         
-        bidir_rels = [rel for rel in self.data['dataModel'].get('relationships', []) 
-                      if rel.get('crossFilteringBehavior') == 'bothDirections']
-        if bidir_rels:
-            warnings.append(f"⚠️  {len(bidir_rels)} bidirectional relationship(s) found (can impact performance)")
+        if bidir_count:
+            warnings.append(f"⚠️  {bidir_count} bidirectional relationship(s) found (can impact performance)")
         
-        many_to_many = [rel for rel in self.data['dataModel'].get('relationships', [])
-                        if rel.get('fromCardinality') == 'many' and rel.get('toCardinality') == 'many']
-        if many_to_many:
-            warnings.append(f"⚠️  {len(many_to_many)} many-to-many relationship(s) found (use with caution)")
+        if many_to_many_count:
+            warnings.append(f"⚠️  {many_to_many_count} many-to-many relationship(s) found (use with caution)")
         
         # Output validation results
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write("=" * 80 + "\n")
+        with open(output_file, 'w', encoding='utf-8', buffering=_WRITE_BUFFER) as f:
+            f.write(_EQ80)
             f.write("MODEL VALIDATION REPORT\n")
-            f.write("=" * 80 + "\n")
-            f.write(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write("=" * 80 + "\n\n")
+            f.write(_EQ80)
+            f.write(f"Generated: {self._timestamp}\n")
+            f.write(_EQ80 + "\n")
             
             if issues:
                 f.write("❌ CRITICAL ISSUES:\n")
-                f.write("-" * 80 + "\n")
+                f.write(_DASH80)
                 for issue in issues:
                     f.write(f"{issue}\n")
                 f.write("\n")
@@ -856,7 +1048,7 @@ class PowerBIAnalyzer:
             
             if warnings:
                 f.write("⚠️  WARNINGS:\n")
-                f.write("-" * 80 + "\n")
+                f.write(_DASH80)
                 for warning in warnings:
                     f.write(f"{warning}\n")
                 f.write("\n")
@@ -865,21 +1057,21 @@ class PowerBIAnalyzer:
             
             # Statistics
             f.write("📊 MODEL STATISTICS:\n")
-            f.write("-" * 80 + "\n")
-            summary = self.data['dataModel'].get('summary', {})
+            f.write(_DASH80)
+            summary = dm.get('summary', {})
             f.write(f"Tables: {summary.get('totalTables', 0)}\n")
             f.write(f"Measures: {summary.get('totalMeasures', 0)}\n")
             f.write(f"Calculated Columns: {summary.get('totalCalculatedColumns', 0)}\n")
             f.write(f"Relationships: {summary.get('totalRelationships', 0)}\n")
-            f.write(f"  - Active: {len([r for r in self.data['dataModel'].get('relationships', []) if r.get('isActive', True)])}\n")
-            f.write(f"  - Inactive: {len(inactive_rels)}\n")
-            f.write(f"  - Bidirectional: {len(bidir_rels)}\n")
-            f.write(f"  - Many-to-Many: {len(many_to_many)}\n")
+            f.write(f"  - Active: {active_count}\n")
+            f.write(f"  - Inactive: {inactive_count}\n")
+            f.write(f"  - Bidirectional: {bidir_count}\n")
+            f.write(f"  - Many-to-Many: {many_to_many_count}\n")
             f.write(f"Security Roles: {summary.get('totalRoles', 0)}\n")
             
-            f.write("\n" + "=" * 80 + "\n")
+            f.write("\n" + _EQ80)
             f.write("SUMMARY:\n")
-            f.write("=" * 80 + "\n")
+            f.write(_EQ80)
             f.write(f"Critical Issues: {len(issues)}\n")
             f.write(f"Warnings: {len(warnings)}\n")
             
@@ -890,168 +1082,188 @@ class PowerBIAnalyzer:
             else:
                 f.write("\n❌ Model has critical issues that should be addressed\n")
         
-        print(f"✅ Model validated:")
-        print(f"   📄 {output_file}")
-        print(f"   ❌ Issues: {len(issues)}")
-        print(f"   ⚠️  Warnings: {len(warnings)}\n")
+        log(f"✅ Model validated:\n"
+            f"   📄 {output_file}\n"
+            f"   ❌ Issues: {len(issues)}\n"
+            f"   ⚠️  Warnings: {len(warnings)}\n")
     
-    def export_all_dax_formulas(self):
+    def export_all_dax_formulas(self, log=print):
         """Export all DAX formulas to separate files."""
-        print("=" * 80)
-        print("5. EXPORTING ALL DAX FORMULAS")
-        print("=" * 80)
+        log("=" * 80)
+        log("5. EXPORTING ALL DAX FORMULAS")
+        log("=" * 80)
         
         # Create DAX subfolder
         dax_dir = os.path.join(self.output_dir, 'DAX_Formulas')
         os.makedirs(dax_dir, exist_ok=True)
         
-        # Export 1: All measures in one file
+        # Build every file's content first, then write them all concurrently.
+        # Keyed by normcase(path) so no two workers ever share a file, even on
+        # case-insensitive filesystems.
+        files = {}
+        
+        # Export 1: All measures in one file; measures are grouped by folder
+        # for Export 3 in the same walk
         all_measures_file = os.path.join(self.output_dir, 'All_DAX_Measures.txt')
         measure_count = 0
+        by_folder = defaultdict(list)
         
-        with open(all_measures_file, 'w', encoding='utf-8') as f:
-            f.write("=" * 80 + "\n")
-            f.write("ALL DAX MEASURES\n")
-            f.write("=" * 80 + "\n")
-            f.write(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write("=" * 80 + "\n\n")
-            
-            for table in self.data['dataModel'].get('tables', []):
-                measures = table.get('measures', [])
-                if measures:
-                    f.write(f"\n{'=' * 80}\n")
-                    f.write(f"TABLE: {table['name']}\n")
-                    f.write(f"{'=' * 80}\n\n")
+        buf = io.StringIO()
+        w = buf.write
+        w(_EQ80)
+        w("ALL DAX MEASURES\n")
+        w(_EQ80)
+        w(f"Generated: {self._timestamp}\n")
+        w(_EQ80 + "\n")
+        
+        for table in self.data['dataModel'].get('tables', []):
+            measures = table.get('measures', [])
+            if measures:
+                table_name = table['name']
+                w("\n" + _EQ80)
+                w(f"TABLE: {table_name}\n")
+                w(_EQ80 + "\n")
+                
+                for measure in measures:
+                    measure_count += 1
+                    by_folder[measure.get('displayFolder', '_Root')].append({
+                        'table': table_name,
+                        'measure': measure
+                    })
+                    parts = [f"-- Measure: {measure['name']}\n"]
+                    if measure.get('displayFolder'):
+                        parts.append(f"-- Folder: {measure['displayFolder']}\n")
+                    if measure.get('formatString'):
+                        parts.append(f"-- Format: {measure['formatString']}\n")
+                    if measure.get('description'):
+                        parts.append(f"-- Description: {measure['description']}\n")
                     
-                    for measure in measures:
-                        measure_count += 1
-                        f.write(f"-- Measure: {measure['name']}\n")
-                        if measure.get('displayFolder'):
-                            f.write(f"-- Folder: {measure['displayFolder']}\n")
-                        if measure.get('formatString'):
-                            f.write(f"-- Format: {measure['formatString']}\n")
-                        if measure.get('description'):
-                            f.write(f"-- Description: {measure['description']}\n")
-                        
-                        # ========== FIX: USE SAFE EXPRESSION GETTER ==========
-                        expr = self._safe_get_expression(measure, 'expression')
-                        f.write(f"\n{expr}\n")
-                        # =====================================================
-                        
-                        f.write("\n" + "-" * 80 + "\n\n")
+                    # ========== FIX: USE SAFE EXPRESSION GETTER ==========
+                    expr = self._safe_get_expression(measure, 'expression')
+                    parts.append(f"\n{expr}\n\n")
+                    # =====================================================
+                    
+                    parts.append(_DASH80)
+                    parts.append("\n")
+                    w(''.join(parts))
         
-        print(f"✅ All measures exported: {all_measures_file}")
-        print(f"   📊 Total measures: {measure_count}")
+        files[os.path.normcase(all_measures_file)] = (all_measures_file, buf.getvalue())
         
         # Export 2: Calculated columns
         calc_cols_file = os.path.join(self.output_dir, 'All_Calculated_Columns.txt')
         calc_col_count = 0
         
-        with open(calc_cols_file, 'w', encoding='utf-8') as f:
-            f.write("=" * 80 + "\n")
-            f.write("ALL CALCULATED COLUMNS\n")
-            f.write("=" * 80 + "\n")
-            f.write(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write("=" * 80 + "\n\n")
-            
-            for table in self.data['dataModel'].get('tables', []):
-                calc_cols = [col for col in table.get('columns', []) if col.get('expression')]
-                if calc_cols:
-                    f.write(f"\n{'=' * 80}\n")
-                    f.write(f"TABLE: {table['name']}\n")
-                    f.write(f"{'=' * 80}\n\n")
-                    
-                    for col in calc_cols:
-                        calc_col_count += 1
-                        f.write(f"-- Column: {col['name']}\n")
-                        f.write(f"-- Data Type: {col.get('dataType', 'N/A')}\n")
-                        if col.get('formatString'):
-                            f.write(f"-- Format: {col['formatString']}\n")
-                        if col.get('description'):
-                            f.write(f"-- Description: {col['description']}\n")
-                        
-                        # ========== FIX: USE SAFE EXPRESSION GETTER ==========
-                        expr = self._safe_get_expression(col, 'expression')
-                        f.write(f"\n{expr}\n")
-                        # =====================================================
-                        
-                        f.write("\n" + "-" * 80 + "\n\n")
+        buf = io.StringIO()
+        w = buf.write
+        w(_EQ80)
+        w("ALL CALCULATED COLUMNS\n")
+        w(_EQ80)
+        w(f"Generated: {self._timestamp}\n")
+        w(_EQ80 + "\n")
         
-        print(f"✅ Calculated columns exported: {calc_cols_file}")
-        print(f"   📊 Total calculated columns: {calc_col_count}")
-        
-        # Export 3: Individual files by folder
-        print(f"✅ Creating individual DAX files by folder...")
-        
-        # Group measures by folder
-        by_folder = defaultdict(list)
         for table in self.data['dataModel'].get('tables', []):
-            for measure in table.get('measures', []):
-                folder = measure.get('displayFolder', '_Root')
-                by_folder[folder].append({
-                    'table': table['name'],
-                    'measure': measure
-                })
-        
-        folder_count = 0
-        for folder, measures in by_folder.items():
-            folder_count += 1
-            safe_folder_name = folder.replace('/', '_').replace('\\', '_').replace(':', '_')
-            folder_file = os.path.join(dax_dir, f'{safe_folder_name}.txt')
-            
-            with open(folder_file, 'w', encoding='utf-8') as f:
-                f.write(f"DAX MEASURES - Folder: {folder}\n")
-                f.write("=" * 80 + "\n\n")
+            calc_cols = [col for col in table.get('columns', []) if col.get('expression')]
+            if calc_cols:
+                w("\n" + _EQ80)
+                w(f"TABLE: {table['name']}\n")
+                w(_EQ80 + "\n")
                 
-                for item in measures:
-                    measure = item['measure']
-                    f.write(f"[{item['table']}].[{measure['name']}]\n")
-                    if measure.get('formatString'):
-                        f.write(f"Format: {measure['formatString']}\n")
+                for col in calc_cols:
+                    calc_col_count += 1
+                    parts = [f"-- Column: {col['name']}\n",
+                             f"-- Data Type: {col.get('dataType', 'N/A')}\n"]
+                    if col.get('formatString'):
+                        parts.append(f"-- Format: {col['formatString']}\n")
+                    if col.get('description'):
+                        parts.append(f"-- Description: {col['description']}\n")
                     
                     # ========== FIX: USE SAFE EXPRESSION GETTER ==========
-                    expr = self._safe_get_expression(measure, 'expression')
-                    f.write(f"\n{expr}\n")
+                    expr = self._safe_get_expression(col, 'expression')
+                    parts.append(f"\n{expr}\n\n")
                     # =====================================================
                     
-                    f.write("\n" + "-" * 80 + "\n\n")
+                    parts.append(_DASH80)
+                    parts.append("\n")
+                    w(''.join(parts))
         
-        print(f"   📁 Created {folder_count} folder files in: {dax_dir}/")
+        files[os.path.normcase(calc_cols_file)] = (calc_cols_file, buf.getvalue())
         
-        # Export 4: Summary file
-        summary_file = os.path.join(self.output_dir, 'DAX_Summary.txt')
-        with open(summary_file, 'w', encoding='utf-8') as f:
-            f.write("=" * 80 + "\n")
-            f.write("DAX FORMULAS SUMMARY\n")
-            f.write("=" * 80 + "\n\n")
+        # Export 3: Individual files by folder
+        folder_count = 0
+        folder_prefix = dax_dir + os.sep
+        buf = io.StringIO()
+        w = buf.write
+        for folder, measures in by_folder.items():
+            folder_count += 1
+            safe_folder_name = folder.translate(_SAFE_FILENAME)
+            folder_file = f'{folder_prefix}{safe_folder_name}.txt'
             
-            f.write(f"Total Measures: {measure_count}\n")
-            f.write(f"Total Calculated Columns: {calc_col_count}\n")
-            f.write(f"Total Display Folders: {len(by_folder)}\n\n")
+            buf.seek(0)
+            buf.truncate()
+            w(f"DAX MEASURES - Folder: {folder}\n")
+            w(_EQ80 + "\n")
             
-            f.write("Measures by Folder:\n")
-            f.write("-" * 80 + "\n")
-            for folder in sorted(by_folder.keys()):
-                f.write(f"  📁 {folder}: {len(by_folder[folder])} measures\n")
+            for item in measures:
+                measure = item['measure']
+                w(f"[{item['table']}].[{measure['name']}]\n")
+                if measure.get('formatString'):
+                    w(f"Format: {measure['formatString']}\n")
+                
+                # ========== FIX: USE SAFE EXPRESSION GETTER ==========
+                expr = self._safe_get_expression(measure, 'expression')
+                w(f"\n{expr}\n")
+                # =====================================================
+                
+                w("\n" + _DASH80 + "\n")
             
-            f.write("\n" + "=" * 80 + "\n")
-            f.write("FILES GENERATED:\n")
-            f.write("=" * 80 + "\n")
-            f.write(f"• All_DAX_Measures.txt - All measures in one file\n")
-            f.write(f"• All_Calculated_Columns.txt - All calculated columns\n")
-            f.write(f"• DAX_Summary.txt - This summary\n")
-            f.write(f"• DAX_Formulas/ - Individual files by folder ({folder_count} files)\n")
-        
-        print(f"✅ DAX summary created: {summary_file}\n")
-
+            # Folders whose names sanitize to the same file (e.g. "X/Y" and
+            # "X_Y") keep the last one, as sequential writes did
+            files[os.path.normcase(folder_file)] = (folder_file, buf.getvalue())
+        
+        # Export 4: Summary file
+        summary_file = os.path.join(self.output_dir, 'DAX_Summary.txt')
+        buf = io.StringIO()
+        w = buf.write
+        w(_EQ80)
+        w("DAX FORMULAS SUMMARY\n")
+        w(_EQ80 + "\n")
+        
+        w(f"Total Measures: {measure_count}\n")
+        w(f"Total Calculated Columns: {calc_col_count}\n")
+        w(f"Total Display Folders: {len(by_folder)}\n\n")
+        
+        w("Measures by Folder:\n")
+        w(_DASH80)
+        w(''.join([f"  📁 {folder}: {len(by_folder[folder])} measures\n"
+                   for folder in sorted(by_folder.keys())]))
+        
+        w("\n" + _EQ80)
+        w("FILES GENERATED:\n")
+        w(_EQ80)
+        w(f"• All_DAX_Measures.txt - All measures in one file\n")
+        w(f"• All_Calculated_Columns.txt - All calculated columns\n")
+        w(f"• DAX_Summary.txt - This summary\n")
+        w(f"• DAX_Formulas/ - Individual files by folder ({folder_count} files)\n")
+        files[os.path.normcase(summary_file)] = (summary_file, buf.getvalue())
+        
+        # Each path is written by exactly one worker; writes release the GIL
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            for future in [executor.submit(_write_text_file, path, content) for path, content in files.values()]:
+                future.result()
+        
+        log(f"✅ All measures exported: {all_measures_file}\n"
+            f"   📊 Total measures: {measure_count}")
+        log(f"✅ Calculated columns exported: {calc_cols_file}\n"
+            f"   📊 Total calculated columns: {calc_col_count}")
+        log(f"✅ Creating individual DAX files by folder...")
+        log(f"   📁 Created {folder_count} folder files in: {dax_dir}/")
+        log(f"✅ DAX summary created: {summary_file}\n")
 
 # =============================================================================
 # MAIN EXECUTION
 # =============================================================================
 
 if __name__ == '__main__':
-    import sys
-    
     # Configuration
     json_input = 'pbix_analysis/complete_analysis.json'  # CHANGE THIS to your JSON file path
     output_directory = 'analysis_output'                  # CHANGE THIS for different output folder
@@ -1062,12 +1274,10 @@ if __name__ == '__main__':
     if len(sys.argv) > 2:
         output_directory = sys.argv[2]
     
-    # Check if pandas is installed
-    try:
-        import pandas as pd
-    except ImportError:
-        print("❌ Error: 'pandas' library not found")
-        print("   Please install it: pip install pandas openpyxl")
+    # Check if an Excel writer is installed
+    if xlsxwriter is None and pd is None:
+        print("❌ Error: neither 'xlsxwriter' nor 'pandas' library found")
+        print("   Please install one: pip install xlsxwriter (or pandas openpyxl)")
         sys.exit(1)
     
     # Run analysis
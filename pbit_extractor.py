@@ -1,30 +1,170 @@
+import io
+import sys
 import zipfile
 import json
 import os
+import re
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
+from itertools import groupby
+from operator import itemgetter
 import base64
+import codecs
+
+# orjson is several times faster than the stdlib json module on both paths
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# A run of 19+ digits may be an integer orjson cannot hold in 64 bits
+_LONG_DIGITS = re.compile(r'[0-9]{19,}')
+_LONG_DIGITS_BYTES = re.compile(rb'[0-9]{19,}')
+
+def _json_loads(data):
+    """Decode JSON from str or UTF-8 bytes, using orjson when it is lossless.
+    
+    orjson rejects some input the stdlib accepts (NaN/Infinity, lone
+    surrogates) and rounds integers beyond 64 bits to floats, so those
+    payloads are decoded by the json module instead.
+    """
+    if orjson is not None:
+        long_digits = _LONG_DIGITS if data.__class__ is str else _LONG_DIGITS_BYTES
+        if long_digits.search(data) is None:
+            try:
+                return orjson.loads(data)
+            except orjson.JSONDecodeError:
+                pass
+    return json.loads(data)
+
+def _sniff_encoding(data):
+    """Guess the text encoding of a JSON member from its BOM or first bytes."""
+    if data.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    if data.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
+    # JSON starts with an ASCII character, so UTF-16 shows a zero byte
+    if data[1:2] == b'\x00':
+        return 'utf-16-le'
+    if data[:1] == b'\x00':
+        return 'utf-16-be'
+    return 'utf-8'
+
+_WRITE_BUFFER = 1 << 20
+
+def _write_text_file(path, content):
+    """Write a finished report straight to a file descriptor as UTF-8."""
+    data = memoryview(content.encode('utf-8'))
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        # os.write may write less than asked for; loop until drained
+        while data:
+            data = data[os.write(fd, data):]
+    finally:
+        os.close(fd)
+
+# Report rules
+_EQ80 = "=" * 80 + "\n"
+_DASH80 = "-" * 80 + "\n"
+
+def _visual_title(single_visual):
+    """Return the literal title text of a visual, or '' if it has none."""
+    try:
+        return single_visual['vcObjects']['title'][0]['properties']['text']['expr']['Literal']['Value']
+    except (KeyError, IndexError, TypeError):
+        return ''
+
+# results keys in the order the _parse_* methods run
+_RESULT_KEYS = (
+    'reportLayout', 'dataModel', 'connections', 'metadata', 'customVisuals',
+    'diagramLayout', 'bookmarks', 'settings', 'mobileLayout', 'theme',
+    'staticResources', 'version', 'fileStructure',
+)
+
+# Archive member names (and directory prefixes) read by the _parse_* methods
+_LAYOUT = 'Report/Layout'
+_DATA_MODEL_SCHEMA = 'DataModelSchema'
+_CONNECTIONS = 'Connections'
+_METADATA = 'Metadata/metadata.json'
+_CUSTOM_VISUALS_DIR = 'Report/CustomVisuals/'
+_DIAGRAM_LAYOUT = 'DiagramLayout'
+_BOOKMARKS = 'Report/bookmarks.json'
+_SETTINGS = 'Settings'
+_MOBILE_STATE = 'Report/MobileState'
+_STATIC_RESOURCES_DIR = 'Report/StaticResources/'
+_BASE_THEMES_DIR = _STATIC_RESOURCES_DIR + 'SharedResources/BaseThemes/'
+_VERSION = 'Version'
+
+# Output files parse() can write; keys of PBIXParser._paths
+_REPORT_FORMATS = ('json', 'summary', 'detailed', 'measures', 'relationships')
+
+# dataModel summary counts, in the order the summary report lists them
+_SUMMARY_KEYS = ('totalTables', 'totalMeasures', 'totalCalculatedColumns',
+                 'totalCalculatedTables', 'totalRelationships', 'totalRoles')
+
+# Fields of a parsed visual printed in the detailed report
+_VISUAL_FIELDS = itemgetter('type', 'x', 'y', 'width', 'height')
+
+# shared immutable default for .get() in the schema loops (serializes as [])
+_EMPTY_TUPLE = ()
 
 class PBIXParser:
     """Comprehensive PBIX/PBIT file parser - Pure Python, no external dependencies."""
     
-    def __init__(self, file_path, output_dir='pbix_analysis'):
+    def __init__(self, file_path, output_dir='pbix_analysis', keep_extracted=False, include_raw=False,
+                 pretty_json=True, keep_annotations=False, report_formats=None):
         self.file_path = file_path
         self.output_dir = output_dir
         self.extract_dir = os.path.join(output_dir, 'extracted')
+        # Which output files to write (default: all of _REPORT_FORMATS)
+        self.report_formats = set(_REPORT_FORMATS if report_formats is None else report_formats)
+        # Output files, in the order _print_summary lists them
+        self._paths = {
+            'json': os.path.join(output_dir, 'complete_analysis.json'),
+            'summary': os.path.join(output_dir, 'summary_report.txt'),
+            'detailed': os.path.join(output_dir, 'detailed_report.txt'),
+            'measures': os.path.join(output_dir, 'measures_report.txt'),
+            'relationships': os.path.join(output_dir, 'relationships_diagram.txt'),
+        }
+        # Members are read straight from the archive; only write them to
+        # extract_dir when the raw files are wanted
+        self.keep_extracted = keep_extracted
+        # Keep each visual's full parsed config in the results (large layouts
+        # repeat multi-MB configs); by default only the visual type is kept
+        self.include_raw = include_raw
+        # Indented complete_analysis.json by default; compact is much cheaper
+        # to encode when no orjson is installed
+        self.pretty_json = pretty_json
+        # Copy annotations and lineage tags of model objects into the results
+        self.keep_annotations = keep_annotations
         self.results = {}
+        self._zip = None
+        self._members = frozenset()
+        # (table, measure) -> joined list expression; reset by each parse()
+        self._expr_cache = {}
     
     # ========== ADD THIS NEW METHOD ==========
-    def _safe_get_expression(self, obj, key='expression'):
-        """Safely get expression - handle both string and list."""
+    def _safe_get_expression(self, obj, key='expression', cache_key=None):
+        """Safely get expression - handle both string and list.
+
+        List expressions are joined once per cache_key (e.g. (table, measure))
+        when one is given.
+        """
         expr = obj.get(key, '')
         
-        # Handle different expression formats
-        if isinstance(expr, list):
-            # If it's a list, join with newlines
-            return '\n'.join(str(item) for item in expr)
-        elif isinstance(expr, str):
+        # Handle different expression formats (decoded JSON has exact types)
+        if expr.__class__ is str:
             return expr
+        elif expr.__class__ is list:
+            # If it's a list, join with newlines
+            if cache_key is None:
+                return '\n'.join(map(str, expr))
+            joined = self._expr_cache.get(cache_key)
+            if joined is None:
+                joined = self._expr_cache[cache_key] = '\n'.join(map(str, expr))
+            return joined
         elif expr is None:
             return ''
         else:
@@ -33,41 +173,65 @@ class PBIXParser:
         
     def parse(self):
         """Main parsing function - extracts everything possible."""
+        # Drop expressions cached by a previous parse() on this instance
+        self._expr_cache = {}
+        # One timestamp for the console header and every report
+        self._timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         print("=" * 80)
         print(f"COMPREHENSIVE POWER BI FILE ANALYSIS")
         print(f"File: {self.file_path}")
-        print(f"Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        print(f"Time: {self._timestamp}")
         print("=" * 80)
         print()
         
         # Create output directories
         os.makedirs(self.output_dir, exist_ok=True)
-        os.makedirs(self.extract_dir, exist_ok=True)
         
-        # Extract the ZIP file
+        # Open the ZIP file
         self._extract_file()
         
-        # Parse all components
-        self._parse_report_layout()
-        self._parse_data_model_schema()
-        self._parse_connections()
-        self._parse_metadata()
-        self._parse_custom_visuals()
-        self._parse_diagram_layout()
-        self._parse_bookmarks()
-        self._parse_report_settings()
-        self._parse_mobile_layout()
-        self._parse_theme()
-        self._parse_static_resources()
-        self._parse_version_info()
-        self._list_all_files()
+        # Parse all components. Each one reads its own members and fills its
+        # own results key, so they run concurrently; their output is buffered
+        # and printed in order.
+        tasks = [
+            self._parse_report_layout,
+            self._parse_data_model_schema,
+            self._parse_connections,
+            self._parse_metadata,
+            self._parse_custom_visuals,
+            self._parse_diagram_layout,
+            self._parse_bookmarks,
+            self._parse_report_settings,
+            self._parse_mobile_layout,
+            self._parse_theme,
+            self._parse_static_resources,
+            self._parse_version_info,
+            self._list_all_files,
+        ]
+        try:
+            self._run_concurrently(tasks, max_workers=8)
+        finally:
+            self._zip.close()
+        
+        # Keep the JSON sections in parse order regardless of which finished
+        # first; any section not listed in _RESULT_KEYS follows the known ones
+        ordered = {key: self.results[key] for key in _RESULT_KEYS if key in self.results}
+        ordered.update(self.results)
+        self.results = ordered
         
-        # Generate outputs
-        self._save_json_output()
-        self._generate_summary_report()
-        self._generate_detailed_report()
-        self._generate_measures_report()
-        self._generate_relationships_diagram()
+        # Generate the requested outputs. Each writer only reads self.results
+        # (which must not change from here on) and writes its own file, so
+        # they run concurrently.
+        writers = {
+            'json': self._save_json_output,
+            'summary': self._generate_summary_report,
+            'detailed': self._generate_detailed_report,
+            'measures': self._generate_measures_report,
+            'relationships': self._generate_relationships_diagram,
+        }
+        writers = [writer for name, writer in writers.items() if name in self.report_formats]
+        if writers:
+            self._run_concurrently(writers)
         
         print("\n" + "=" * 80)
         print("✓ ANALYSIS COMPLETE!")
@@ -76,28 +240,68 @@ class PBIXParser:
         
         return self.results
     
+    def _run_concurrently(self, tasks, max_workers=None):
+        """Run tasks in a thread pool, then print their logs in task order.
+        
+        Each task is called with a print-like log function that collects its
+        messages, so sys.stdout is never swapped.
+        """
+        def run(task, lines):
+            def log(*args):
+                lines.append(' '.join(map(str, args)) + '\n')
+            try:
+                task(log)
+            except Exception as e:
+                return e
+            return None
+        
+        logs = [[] for _ in tasks]
+        with ThreadPoolExecutor(max_workers=min(max_workers or len(tasks), len(tasks))) as executor:
+            errors = list(executor.map(run, tasks, logs))
+        
+        # Flush the whole log with one write, then surface any failure
+        sys.stdout.write(''.join([line for lines in logs for line in lines]))
+        for error in errors:
+            if error is not None:
+                raise error
+    
     def _extract_file(self):
-        """Extract PBIX/PBIT file (it's a ZIP archive)."""
-        print("📦 Extracting file...")
+        """Open PBIX/PBIT file (it's a ZIP archive), extracting it if requested."""
+        print("📦 Opening file...")
         try:
-            with zipfile.ZipFile(self.file_path, 'r') as zip_ref:
-                zip_ref.extractall(self.extract_dir)
-            print(f"   ✓ Extracted to: {self.extract_dir}\n")
+            self._zip = zipfile.ZipFile(self.file_path, 'r')
+            self._members = frozenset(self._zip.namelist())
+            if self.keep_extracted:
+                os.makedirs(self.extract_dir, exist_ok=True)
+                self._zip.extractall(self.extract_dir)
+                print(f"   ✓ Extracted to: {self.extract_dir}\n")
+            else:
+                print(f"   ✓ Reading {len(self._members)} archive members in memory\n")
         except Exception as e:
-            print(f"   ✗ Error extracting file: {e}\n")
+            print(f"   ✗ Error opening file: {e}\n")
             raise
     
-    def _parse_report_layout(self):
+    def _read_member(self, name):
+        """Return the bytes of an archive member, or None if it is absent."""
+        if name not in self._members:
+            return None
+        return self._zip.read(name)
+    
+    def _list_members(self, prefix):
+        """Return (relative name, ZipInfo) for every file under prefix."""
+        return [(info.filename[len(prefix):], info) for info in self._zip.infolist()
+                if info.filename.startswith(prefix) and not info.is_dir()]
+    
+    def _parse_report_layout(self, log=print):
         """Parse Report Layout - pages, visuals, filters."""
-        print("📄 Parsing Report Layout...")
+        log("📄 Parsing Report Layout...")
         try:
-            layout_path = os.path.join(self.extract_dir, 'Report', 'Layout')
-            if not os.path.exists(layout_path):
-                print("   ⚠ Layout file not found\n")
+            data = self._read_member(_LAYOUT)
+            if data is None:
+                log("   ⚠ Layout file not found\n")
                 return
             
-            with open(layout_path, 'r', encoding='utf-16-le') as f:
-                layout = json.load(f)
+            layout = _json_loads(data.decode('utf-16-le'))
             
             self.results['reportLayout'] = {
                 'id': layout.get('id'),
@@ -137,28 +341,26 @@ class PBIXParser:
                     config_str = visual.get('config', '')
                     if config_str:
                         try:
-                            config = json.loads(config_str)
-                            visual_info['config'] = config
+                            config = _json_loads(config_str)
+                            visual_info['rawConfigSize'] = len(config_str)
+                            if self.include_raw:
+                                visual_info['config'] = config
                             
                             # Extract visual type
                             if 'singleVisual' in config:
-                                visual_type = config['singleVisual'].get('visualType', 'Unknown')
-                                visual_info['type'] = visual_type
+                                single_visual = config['singleVisual']
+                                visual_info['type'] = single_visual.get('visualType', 'Unknown')
+                                if not self.include_raw:
+                                    visual_info['config'] = {'singleVisual': {'visualType': visual_info['type']}}
                                 
                                 # Extract visual title
-                                if 'vcObjects' in config['singleVisual']:
-                                    vc_objects = config['singleVisual']['vcObjects']
-                                    if 'title' in vc_objects:
-                                        title_obj = vc_objects['title'][0]
-                                        if 'properties' in title_obj:
-                                            title_props = title_obj['properties']
-                                            if 'text' in title_props:
-                                                visual_info['title'] = title_props['text'].get('expr', {}).get('Literal', {}).get('Value', '')
+                                visual_info['title'] = _visual_title(single_visual)
                                 
                                 # Extract data roles (what fields are used)
-                                if 'prototypeQuery' in config['singleVisual']:
-                                    proto = config['singleVisual']['prototypeQuery']
-                                    visual_info['dataRoles'] = proto
+                                try:
+                                    visual_info['dataRoles'] = single_visual['prototypeQuery']
+                                except KeyError:
+                                    pass
                         except json.JSONDecodeError:
                             pass
                     
@@ -166,7 +368,7 @@ class PBIXParser:
                     filters_str = visual.get('filters', '')
                     if filters_str:
                         try:
-                            visual_info['filters'] = json.loads(filters_str)
+                            visual_info['filters'] = _json_loads(filters_str)
                         except:
                             visual_info['filters'] = filters_str
                     
@@ -175,24 +377,23 @@ class PBIXParser:
                 self.results['reportLayout']['pages'].append(page_info)
             
             total_visuals = sum(len(p['visualContainers']) for p in self.results['reportLayout']['pages'])
-            print(f"   ✓ Found {len(self.results['reportLayout']['pages'])} pages")
-            print(f"   ✓ Found {total_visuals} total visuals\n")
+            log(f"   ✓ Found {len(self.results['reportLayout']['pages'])} pages")
+            log(f"   ✓ Found {total_visuals} total visuals\n")
             
         except Exception as e:
-            print(f"   ✗ Error parsing layout: {e}\n")
+            log(f"   ✗ Error parsing layout: {e}\n")
     
-    def _parse_data_model_schema(self):
+    def _parse_data_model_schema(self, log=print):
         """Parse DataModelSchema - tables, columns, measures, relationships."""
-        print("🗄️  Parsing Data Model Schema...")
+        log("🗄️  Parsing Data Model Schema...")
         try:
-            schema_path = os.path.join(self.extract_dir, 'DataModelSchema')
-            if not os.path.exists(schema_path):
-                print("   ⚠ DataModelSchema not found (older PBIX format)")
-                print("   → Recommend converting to PBIT or using pbi-tools\n")
+            data = self._read_member(_DATA_MODEL_SCHEMA)
+            if data is None:
+                log("   ⚠ DataModelSchema not found (older PBIX format)")
+                log("   → Recommend converting to PBIT or using pbi-tools\n")
                 return
             
-            with open(schema_path, 'r', encoding='utf-16-le') as f:
-                schema = json.load(f)
+            schema = _json_loads(data.decode('utf-16-le'))
             
             model = schema.get('model', {})
             
@@ -205,81 +406,77 @@ class PBIXParser:
                 'relationships': [],
                 'cultures': [],
                 'perspectives': [],
-                'roles': [],
-                'annotations': model.get('annotations', [])
+                'roles': []
             }
+            # Annotations and lineage tags are authoring metadata no report reads
+            keep_annotations = self.keep_annotations
+            if keep_annotations:
+                self.results['dataModel']['annotations'] = model.get('annotations', _EMPTY_TUPLE)
             
             # Parse tables
-            all_measures = []
-            all_calculated_columns = []
-            all_calculated_tables = []
-            
-            for table in model.get('tables', []):
+            for table in model.get('tables', _EMPTY_TUPLE):
+                table_name = table.get('name')
                 table_info = {
-                    'name': table.get('name'),
+                    'name': table_name,
                     'description': table.get('description', ''),
                     'isHidden': table.get('isHidden', False),
                     'isPrivate': table.get('isPrivate', False),
-                    'lineageTag': table.get('lineageTag'),
                     'columns': [],
                     'measures': [],
                     'hierarchies': [],
-                    'partitions': [],
-                    'annotations': table.get('annotations', [])
+                    'partitions': []
                 }
+                if keep_annotations:
+                    table_info['lineageTag'] = table.get('lineageTag')
+                    table_info['annotations'] = table.get('annotations', _EMPTY_TUPLE)
                 
                 # Parse columns
-                for col in table.get('columns', []):
+                for col in table.get('columns', _EMPTY_TUPLE):
+                    col_get = col.get
                     col_info = {
-                        'name': col.get('name'),
-                        'dataType': col.get('dataType'),
-                        'isHidden': col.get('isHidden', False),
-                        'isKey': col.get('isKey', False),
-                        'isNullable': col.get('isNullable', True),
-                        'sourceColumn': col.get('sourceColumn'),
-                        'formatString': col.get('formatString'),
-                        'dataCategory': col.get('dataCategory'),
-                        'summarizeBy': col.get('summarizeBy', 'default'),
-                        'displayFolder': col.get('displayFolder', ''),
-                        'description': col.get('description', ''),
-                        'expression': col.get('expression'),  # Calculated column DAX
-                        'sortByColumn': col.get('sortByColumn'),
-                        'annotations': col.get('annotations', [])
+                        'name': col_get('name'),
+                        'dataType': col_get('dataType'),
+                        'isHidden': col_get('isHidden', False),
+                        'isKey': col_get('isKey', False),
+                        'isNullable': col_get('isNullable', True),
+                        'sourceColumn': col_get('sourceColumn'),
+                        'formatString': col_get('formatString'),
+                        'dataCategory': col_get('dataCategory'),
+                        'summarizeBy': col_get('summarizeBy', 'default'),
+                        'displayFolder': col_get('displayFolder', ''),
+                        'description': col_get('description', ''),
+                        'expression': col_get('expression'),  # Calculated column DAX
+                        'sortByColumn': col_get('sortByColumn')
                     }
-                    
-                    if col_info['expression']:
-                        all_calculated_columns.append(f"{table['name']}[{col['name']}]")
+                    if keep_annotations:
+                        col_info['annotations'] = col_get('annotations', _EMPTY_TUPLE)
                     
                     table_info['columns'].append(col_info)
                 
                 # Parse measures
-                for measure in table.get('measures', []):
+                for measure in table.get('measures', _EMPTY_TUPLE):
+                    measure_get = measure.get
                     measure_info = {
-                        'name': measure.get('name'),
-                        'expression': measure.get('expression'),
-                        'formatString': measure.get('formatString'),
-                        'isHidden': measure.get('isHidden', False),
-                        'displayFolder': measure.get('displayFolder', ''),
-                        'description': measure.get('description', ''),
-                        'lineageTag': measure.get('lineageTag'),
-                        'annotations': measure.get('annotations', [])
+                        'name': measure_get('name'),
+                        'expression': measure_get('expression'),
+                        'formatString': measure_get('formatString'),
+                        'isHidden': measure_get('isHidden', False),
+                        'displayFolder': measure_get('displayFolder', ''),
+                        'description': measure_get('description', '')
                     }
+                    if keep_annotations:
+                        measure_info['lineageTag'] = measure_get('lineageTag')
+                        measure_info['annotations'] = measure_get('annotations', _EMPTY_TUPLE)
                     table_info['measures'].append(measure_info)
-                    all_measures.append({
-                        'table': table['name'],
-                        'measure': measure['name'],
-                        'expression': measure.get('expression', ''),
-                        'displayFolder': measure.get('displayFolder', '')
-                    })
                 
                 # Parse hierarchies
-                for hierarchy in table.get('hierarchies', []):
+                for hierarchy in table.get('hierarchies', _EMPTY_TUPLE):
                     hier_info = {
                         'name': hierarchy.get('name'),
                         'isHidden': hierarchy.get('isHidden', False),
                         'levels': []
                     }
-                    for level in hierarchy.get('levels', []):
+                    for level in hierarchy.get('levels', _EMPTY_TUPLE):
                         hier_info['levels'].append({
                             'name': level.get('name'),
                             'column': level.get('column'),
@@ -288,24 +485,20 @@ class PBIXParser:
                     table_info['hierarchies'].append(hier_info)
                 
                 # Parse partitions (data source queries)
-                for partition in table.get('partitions', []):
+                for partition in table.get('partitions', _EMPTY_TUPLE):
                     part_info = {
                         'name': partition.get('name'),
                         'mode': partition.get('mode'),
-                        'source': partition.get('source', {}),
-                        'annotations': partition.get('annotations', [])
+                        'source': partition.get('source', {})
                     }
-                    
-                    # Check if it's a calculated table
-                    if part_info['source'].get('type') == 'calculated':
-                        all_calculated_tables.append(table['name'])
-                    
+                    if keep_annotations:
+                        part_info['annotations'] = partition.get('annotations', _EMPTY_TUPLE)
                     table_info['partitions'].append(part_info)
                 
                 self.results['dataModel']['tables'].append(table_info)
             
             # Parse relationships
-            for rel in model.get('relationships', []):
+            for rel in model.get('relationships', _EMPTY_TUPLE):
                 rel_info = {
                     'name': rel.get('name'),
                     'fromTable': rel.get('fromTable'),
@@ -317,28 +510,31 @@ class PBIXParser:
                     'crossFilteringBehavior': rel.get('crossFilteringBehavior'),
                     'securityFilteringBehavior': rel.get('securityFilteringBehavior'),
                     'isActive': rel.get('isActive', True),
-                    'relyOnReferentialIntegrity': rel.get('relyOnReferentialIntegrity', False),
-                    'annotations': rel.get('annotations', [])
+                    'relyOnReferentialIntegrity': rel.get('relyOnReferentialIntegrity', False)
                 }
+                if keep_annotations:
+                    rel_info['annotations'] = rel.get('annotations', _EMPTY_TUPLE)
                 self.results['dataModel']['relationships'].append(rel_info)
             
             # Parse cultures (translations)
-            for culture in model.get('cultures', []):
+            for culture in model.get('cultures', _EMPTY_TUPLE):
                 self.results['dataModel']['cultures'].append({
                     'name': culture.get('name'),
                     'linguisticMetadata': culture.get('linguisticMetadata', {})
                 })
             
             # Parse perspectives
-            for perspective in model.get('perspectives', []):
-                self.results['dataModel']['perspectives'].append({
+            for perspective in model.get('perspectives', _EMPTY_TUPLE):
+                perspective_info = {
                     'name': perspective.get('name'),
-                    'description': perspective.get('description', ''),
-                    'annotations': perspective.get('annotations', [])
-                })
+                    'description': perspective.get('description', '')
+                }
+                if keep_annotations:
+                    perspective_info['annotations'] = perspective.get('annotations', _EMPTY_TUPLE)
+                self.results['dataModel']['perspectives'].append(perspective_info)
             
             # Parse RLS roles
-            for role in model.get('roles', []):
+            for role in model.get('roles', _EMPTY_TUPLE):
                 role_info = {
                     'name': role.get('name'),
                     'description': role.get('description', ''),
@@ -346,15 +542,31 @@ class PBIXParser:
                     'tablePermissions': []
                 }
                 
-                for perm in role.get('tablePermissions', []):
-                    role_info['tablePermissions'].append({
+                for perm in role.get('tablePermissions', _EMPTY_TUPLE):
+                    perm_info = {
                         'name': perm.get('name'),
-                        'filterExpression': perm.get('filterExpression'),
-                        'annotations': perm.get('annotations', [])
-                    })
+                        'filterExpression': perm.get('filterExpression')
+                    }
+                    if keep_annotations:
+                        perm_info['annotations'] = perm.get('annotations', _EMPTY_TUPLE)
+                    role_info['tablePermissions'].append(perm_info)
                 
                 self.results['dataModel']['roles'].append(role_info)
             
+            # Derive the model-wide lists from the parsed tables
+            tables = self.results['dataModel']['tables']
+            all_measures = [{
+                'table': table['name'],
+                'measure': measure['name'],
+                'expression': measure['expression'] if measure['expression'] is not None else '',
+                'displayFolder': measure['displayFolder']
+            } for table in tables for measure in table['measures']]
+            all_calculated_columns = [f"{table['name']}[{col['name']}]"
+                                      for table in tables for col in table['columns'] if col['expression']]
+            # A table is calculated if one of its partitions has a calculated source
+            all_calculated_tables = [table['name'] for table in tables for part in table['partitions']
+                                     if part['source'].get('type') == 'calculated']
+            
             # Store summary counts
             self.results['dataModel']['summary'] = {
                 'totalTables': len(self.results['dataModel']['tables']),
@@ -368,44 +580,36 @@ class PBIXParser:
                 'calculatedTables': all_calculated_tables
             }
             
-            print(f"   ✓ Found {len(self.results['dataModel']['tables'])} tables")
-            print(f"   ✓ Found {len(all_measures)} measures")
-            print(f"   ✓ Found {len(all_calculated_columns)} calculated columns")
-            print(f"   ✓ Found {len(all_calculated_tables)} calculated tables")
-            print(f"   ✓ Found {len(self.results['dataModel']['relationships'])} relationships")
+            log(f"   ✓ Found {len(self.results['dataModel']['tables'])} tables")
+            log(f"   ✓ Found {len(all_measures)} measures")
+            log(f"   ✓ Found {len(all_calculated_columns)} calculated columns")
+            log(f"   ✓ Found {len(all_calculated_tables)} calculated tables")
+            log(f"   ✓ Found {len(self.results['dataModel']['relationships'])} relationships")
             if self.results['dataModel']['roles']:
-                print(f"   ✓ Found {len(self.results['dataModel']['roles'])} security roles")
-            print()
+                log(f"   ✓ Found {len(self.results['dataModel']['roles'])} security roles")
+            log()
             
         except Exception as e:
-            print(f"   ✗ Error parsing data model: {e}\n")
+            log(f"   ✗ Error parsing data model: {e}\n")
     
-    def _parse_connections(self):
+    def _parse_connections(self, log=print):
         """Parse Connections - data sources."""
-        print("🔌 Parsing Data Connections...")
+        log("🔌 Parsing Data Connections...")
         try:
-            connections_path = os.path.join(self.extract_dir, 'Connections')
-            if not os.path.exists(connections_path):
-                print("   ⚠ Connections file not found\n")
+            data = self._read_member(_CONNECTIONS)
+            if data is None:
+                log("   ⚠ Connections file not found\n")
                 return
             
-            # Try different encodings
-            connections = None
-            encodings_to_try = ['utf-16-le', 'utf-8', 'utf-16', 'utf-16-be']
-            
-            for encoding in encodings_to_try:
-                try:
-                    with open(connections_path, 'r', encoding=encoding) as f:
-                        connections = json.load(f)
-                    print(f"   ✓ Successfully read with {encoding} encoding")
-                    break
-                except (UnicodeDecodeError, json.JSONDecodeError):
-                    continue
-            
-            if connections is None:
-                print("   ⚠ Could not read Connections file with any known encoding")
-                print("   Skipping connections parsing\n")
+            # Detect the encoding from the BOM or the first bytes
+            encoding = _sniff_encoding(data)
+            try:
+                connections = _json_loads(data.decode(encoding))
+            except (UnicodeDecodeError, json.JSONDecodeError) as e:
+                log(f"   ⚠ Could not read Connections file as {encoding} JSON: {e}")
+                log("   Skipping connections parsing\n")
                 return
+            log(f"   ✓ Successfully read with {encoding} encoding")
             
             self.results['connections'] = []
             for conn in connections.get('Connections', []):
@@ -419,11 +623,11 @@ class PBIXParser:
                 }
                 self.results['connections'].append(conn_info)
             
-            print(f"   ✓ Found {len(self.results['connections'])} data source connections\n")
+            log(f"   ✓ Found {len(self.results['connections'])} data source connections\n")
             
         except Exception as e:
-            print(f"   ⚠ Error parsing connections: {e}")
-            print("   Continuing without connections data\n")
+            log(f"   ⚠ Error parsing connections: {e}")
+            log("   Continuing without connections data\n")
     
     
     # def _parse_connections(self):
@@ -455,542 +659,576 @@ class PBIXParser:
     #     except Exception as e:
     #         print(f"   ✗ Error parsing connections: {e}\n")
     
-    def _parse_metadata(self):
+    def _parse_metadata(self, log=print):
         """Parse Metadata."""
-        print("ℹ️  Parsing Metadata...")
+        log("ℹ️  Parsing Metadata...")
         try:
-            metadata_path = os.path.join(self.extract_dir, 'Metadata', 'metadata.json')
-            if not os.path.exists(metadata_path):
-                print("   ⚠ Metadata file not found\n")
+            data = self._read_member(_METADATA)
+            if data is None:
+                log("   ⚠ Metadata file not found\n")
                 return
             
-            with open(metadata_path, 'r', encoding='utf-8') as f:
-                metadata = json.load(f)
+            metadata = _json_loads(data)
             
             self.results['metadata'] = metadata
-            print(f"   ✓ Metadata loaded\n")
+            log(f"   ✓ Metadata loaded\n")
             
         except Exception as e:
-            print(f"   ✗ Error parsing metadata: {e}\n")
+            log(f"   ✗ Error parsing metadata: {e}\n")
     
-    def _parse_custom_visuals(self):
+    def _parse_custom_visuals(self, log=print):
         """Parse Custom Visuals."""
-        print("🎨 Parsing Custom Visuals...")
+        log("🎨 Parsing Custom Visuals...")
         try:
-            custom_visuals_dir = os.path.join(self.extract_dir, 'Report', 'CustomVisuals')
-            if not os.path.exists(custom_visuals_dir):
-                print("   ⚠ No custom visuals found\n")
+            members = self._list_members(_CUSTOM_VISUALS_DIR)
+            if not members:
+                log("   ⚠ No custom visuals found\n")
                 return
             
+            # Top-level entries: a directory's size is the total of its files
+            items = {}
+            for rel_name, info in members:
+                item = rel_name.split('/', 1)[0]
+                items[item] = items.get(item, 0) + info.file_size
+            
             self.results['customVisuals'] = []
-            for item in os.listdir(custom_visuals_dir):
+            for item, size in items.items():
                 if not item.startswith('.'):
-                    visual_path = os.path.join(custom_visuals_dir, item)
                     visual_info = {
                         'name': item,
-                        'size': os.path.getsize(visual_path)
+                        'size': size
                     }
                     
                     # Try to read package.json if it's a directory
-                    if os.path.isdir(visual_path):
-                        package_json = os.path.join(visual_path, 'package.json')
-                        if os.path.exists(package_json):
-                            try:
-                                with open(package_json, 'r', encoding='utf-8') as f:
-                                    package = json.load(f)
-                                visual_info['package'] = package
-                            except:
-                                pass
+                    package_json = self._read_member(f'{_CUSTOM_VISUALS_DIR}{item}/package.json')
+                    if package_json is not None:
+                        try:
+                            visual_info['package'] = _json_loads(package_json)
+                        except:
+                            pass
                     
                     self.results['customVisuals'].append(visual_info)
             
-            print(f"   ✓ Found {len(self.results['customVisuals'])} custom visuals\n")
+            log(f"   ✓ Found {len(self.results['customVisuals'])} custom visuals\n")
             
         except Exception as e:
-            print(f"   ✗ Error parsing custom visuals: {e}\n")
+            log(f"   ✗ Error parsing custom visuals: {e}\n")
     
-    def _parse_diagram_layout(self):
+    def _parse_diagram_layout(self, log=print):
         """Parse DiagramLayout - model diagram."""
-        print("📐 Parsing Diagram Layout...")
+        log("📐 Parsing Diagram Layout...")
         try:
-            diagram_path = os.path.join(self.extract_dir, 'DiagramLayout')
-            if not os.path.exists(diagram_path):
-                print("   ⚠ Diagram layout not found\n")
+            data = self._read_member(_DIAGRAM_LAYOUT)
+            if data is None:
+                log("   ⚠ Diagram layout not found\n")
                 return
             
-            with open(diagram_path, 'r', encoding='utf-16-le') as f:
-                diagram = json.load(f)
+            diagram = _json_loads(data.decode('utf-16-le'))
             
             self.results['diagramLayout'] = diagram
-            print(f"   ✓ Diagram layout loaded\n")
+            log(f"   ✓ Diagram layout loaded\n")
             
         except Exception as e:
-            print(f"   ✗ Error parsing diagram layout: {e}\n")
+            log(f"   ✗ Error parsing diagram layout: {e}\n")
     
-    def _parse_bookmarks(self):
+    def _parse_bookmarks(self, log=print):
         """Parse bookmarks."""
-        print("🔖 Parsing Bookmarks...")
+        log("🔖 Parsing Bookmarks...")
         try:
             # Bookmarks can be in Report/bookmarks.json or in Layout
-            bookmarks_path = os.path.join(self.extract_dir, 'Report', 'bookmarks.json')
+            data = self._read_member(_BOOKMARKS)
             
-            if os.path.exists(bookmarks_path):
-                with open(bookmarks_path, 'r', encoding='utf-8') as f:
-                    bookmarks = json.load(f)
+            if data is not None:
+                bookmarks = _json_loads(data)
                 self.results['bookmarks'] = bookmarks
-                print(f"   ✓ Found bookmarks\n")
+                log(f"   ✓ Found bookmarks\n")
             else:
-                print("   ⚠ No bookmarks found\n")
+                log("   ⚠ No bookmarks found\n")
             
         except Exception as e:
-            print(f"   ✗ Error parsing bookmarks: {e}\n")
+            log(f"   ✗ Error parsing bookmarks: {e}\n")
     
-    def _parse_report_settings(self):
+    def _parse_report_settings(self, log=print):
         """Parse report settings."""
-        print("⚙️  Parsing Report Settings...")
+        log("⚙️  Parsing Report Settings...")
         try:
-            settings_path = os.path.join(self.extract_dir, 'Settings')
-            if not os.path.exists(settings_path):
-                print("   ⚠ Settings file not found\n")
+            data = self._read_member(_SETTINGS)
+            if data is None:
+                log("   ⚠ Settings file not found\n")
                 return
             
-            with open(settings_path, 'r', encoding='utf-16-le') as f:
-                settings = json.load(f)
+            settings = _json_loads(data.decode('utf-16-le'))
             
             self.results['settings'] = settings
-            print(f"   ✓ Settings loaded\n")
+            log(f"   ✓ Settings loaded\n")
             
         except Exception as e:
-            print(f"   ✗ Error parsing settings: {e}\n")
+            log(f"   ✗ Error parsing settings: {e}\n")
     
-    def _parse_mobile_layout(self):
+    def _parse_mobile_layout(self, log=print):
         """Parse mobile layout if present."""
-        print("📱 Parsing Mobile Layout...")
+        log("📱 Parsing Mobile Layout...")
         try:
-            mobile_path = os.path.join(self.extract_dir, 'Report', 'MobileState')
-            if not os.path.exists(mobile_path):
-                print("   ⚠ No mobile layout found\n")
+            data = self._read_member(_MOBILE_STATE)
+            if data is None:
+                log("   ⚠ No mobile layout found\n")
                 return
             
-            with open(mobile_path, 'r', encoding='utf-16-le') as f:
-                mobile = json.load(f)
+            mobile = _json_loads(data.decode('utf-16-le'))
             
             self.results['mobileLayout'] = mobile
-            print(f"   ✓ Mobile layout loaded\n")
+            log(f"   ✓ Mobile layout loaded\n")
             
         except Exception as e:
-            print(f"   ✗ Error parsing mobile layout: {e}\n")
+            log(f"   ✗ Error parsing mobile layout: {e}\n")
     
-    def _parse_theme(self):
+    def _parse_theme(self, log=print):
         """Parse report theme."""
-        print("🎨 Parsing Theme...")
+        log("🎨 Parsing Theme...")
         try:
-            theme_path = os.path.join(self.extract_dir, 'Report', 'StaticResources', 'SharedResources', 'BaseThemes')
-            if not os.path.exists(theme_path):
-                print("   ⚠ Theme not found\n")
+            members = self._list_members(_BASE_THEMES_DIR)
+            if not members:
+                log("   ⚠ Theme not found\n")
                 return
             
             # Theme might be in various locations
-            for item in os.listdir(theme_path):
-                if item.endswith('.json'):
-                    with open(os.path.join(theme_path, item), 'r', encoding='utf-8') as f:
-                        theme = json.load(f)
+            for item, info in members:
+                if '/' not in item and item.endswith('.json'):
+                    theme = _json_loads(self._zip.read(info))
                     self.results['theme'] = theme
-                    print(f"   ✓ Theme loaded: {item}\n")
+                    log(f"   ✓ Theme loaded: {item}\n")
                     break
             
         except Exception as e:
-            print(f"   ✗ Error parsing theme: {e}\n")
+            log(f"   ✗ Error parsing theme: {e}\n")
     
-    def _parse_static_resources(self):
+    def _parse_static_resources(self, log=print):
         """Parse static resources (images, etc.)."""
-        print("🖼️  Parsing Static Resources...")
+        log("🖼️  Parsing Static Resources...")
         try:
-            static_path = os.path.join(self.extract_dir, 'Report', 'StaticResources')
-            if not os.path.exists(static_path):
-                print("   ⚠ No static resources found\n")
+            members = self._list_members(_STATIC_RESOURCES_DIR)
+            if not members:
+                log("   ⚠ No static resources found\n")
                 return
             
             self.results['staticResources'] = []
-            for root, dirs, files in os.walk(static_path):
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    rel_path = os.path.relpath(file_path, static_path)
-                    self.results['staticResources'].append({
-                        'path': rel_path,
-                        'size': os.path.getsize(file_path),
-                        'extension': os.path.splitext(file)[1]
-                    })
+            for rel_path, info in members:
+                self.results['staticResources'].append({
+                    'path': rel_path,
+                    'size': info.file_size,
+                    'extension': os.path.splitext(rel_path)[1]
+                })
             
             if self.results['staticResources']:
-                print(f"   ✓ Found {len(self.results['staticResources'])} static resources\n")
+                log(f"   ✓ Found {len(self.results['staticResources'])} static resources\n")
             else:
-                print("   ⚠ No static resources found\n")
+                log("   ⚠ No static resources found\n")
             
         except Exception as e:
-            print(f"   ✗ Error parsing static resources: {e}\n")
+            log(f"   ✗ Error parsing static resources: {e}\n")
     
-    def _parse_version_info(self):
+    def _parse_version_info(self, log=print):
         """Parse version information."""
-        print("🔢 Parsing Version Info...")
+        log("🔢 Parsing Version Info...")
         try:
-            version_path = os.path.join(self.extract_dir, 'Version')
-            if not os.path.exists(version_path):
-                print("   ⚠ Version file not found\n")
+            data = self._read_member(_VERSION)
+            if data is None:
+                log("   ⚠ Version file not found\n")
                 return
             
-            with open(version_path, 'r', encoding='utf-8') as f:
-                version = f.read().strip()
+            version = data.decode('utf-8').strip()
             
             self.results['version'] = version
-            print(f"   ✓ Version: {version}\n")
+            log(f"   ✓ Version: {version}\n")
             
         except Exception as e:
-            print(f"   ✗ Error parsing version: {e}\n")
+            log(f"   ✗ Error parsing version: {e}\n")
     
-    def _list_all_files(self):
-        """List all files in the extracted archive."""
-        print("📂 Cataloging All Files...")
+    def _list_all_files(self, log=print):
+        """List all files in the archive."""
+        log("📂 Cataloging All Files...")
         try:
             self.results['fileStructure'] = []
-            for root, dirs, files in os.walk(self.extract_dir):
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    rel_path = os.path.relpath(file_path, self.extract_dir)
-                    self.results['fileStructure'].append({
-                        'path': rel_path,
-                        'size': os.path.getsize(file_path)
-                    })
+            for rel_path, info in self._list_members(''):
+                self.results['fileStructure'].append({
+                    'path': rel_path,
+                    'size': info.file_size
+                })
             
-            print(f"   ✓ Cataloged {len(self.results['fileStructure'])} files\n")
+            log(f"   ✓ Cataloged {len(self.results['fileStructure'])} files\n")
             
         except Exception as e:
-            print(f"   ✗ Error listing files: {e}\n")
+            log(f"   ✗ Error listing files: {e}\n")
     
-    def _save_json_output(self):
+    def _save_json_output(self, log=print):
         """Save complete results as JSON."""
-        output_file = os.path.join(self.output_dir, 'complete_analysis.json')
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(self.results, f, indent=2, ensure_ascii=False)
-        print(f"💾 Saved complete JSON: {output_file}")
+        output_file = self._paths['json']
+        payload = None
+        if orjson is not None:
+            option = orjson.OPT_INDENT_2 if self.pretty_json else 0
+            try:
+                payload = orjson.dumps(self.results, option=option)
+            except orjson.JSONEncodeError:
+                # e.g. integers beyond 64 bits; the stdlib path below handles them
+                pass
+        if payload is not None:
+            with open(output_file, 'wb') as f:
+                f.write(payload)
+        elif self.pretty_json:
+            with open(output_file, 'w', encoding='utf-8', buffering=_WRITE_BUFFER) as f:
+                json.dump(self.results, f, indent=2, ensure_ascii=False)
+        else:
+            # Without indent the C encoder is used; write the result in one go
+            with open(output_file, 'w', encoding='utf-8') as f:
+                f.write(json.dumps(self.results, ensure_ascii=False, separators=(',', ':')))
+        log(f"💾 Saved complete JSON: {output_file}")
     
-    def _generate_summary_report(self):
+    def _generate_summary_report(self, log=print):
         """Generate a concise summary report."""
-        output_file = os.path.join(self.output_dir, 'summary_report.txt')
+        output_file = self._paths['summary']
+        results = self.results
+        rl = results.get('reportLayout')
+        dm = results.get('dataModel')
         
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write("=" * 80 + "\n")
-            f.write("POWER BI FILE - SUMMARY REPORT\n")
-            f.write("=" * 80 + "\n")
-            f.write(f"File: {self.file_path}\n")
-            f.write(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write("=" * 80 + "\n\n")
-            
-            # Report Pages
-            if 'reportLayout' in self.results:
-                pages = self.results['reportLayout'].get('pages', [])
-                f.write(f"📄 REPORT PAGES: {len(pages)}\n")
-                f.write("-" * 80 + "\n")
-                for page in pages:
-                    f.write(f"  • {page['displayName']}\n")
-                    f.write(f"    Visuals: {len(page['visualContainers'])}\n")
-                f.write("\n")
-            
-            # Data Model
-            if 'dataModel' in self.results:
-                dm = self.results['dataModel']
-                summary = dm.get('summary', {})
-                
-                f.write(f"🗄️  DATA MODEL\n")
-                f.write("-" * 80 + "\n")
-                f.write(f"  Tables: {summary.get('totalTables', 0)}\n")
-                f.write(f"  Measures: {summary.get('totalMeasures', 0)}\n")
-                f.write(f"  Calculated Columns: {summary.get('totalCalculatedColumns', 0)}\n")
-                f.write(f"  Calculated Tables: {summary.get('totalCalculatedTables', 0)}\n")
-                f.write(f"  Relationships: {summary.get('totalRelationships', 0)}\n")
-                f.write(f"  Security Roles: {summary.get('totalRoles', 0)}\n")
-                f.write("\n")
-            
-            # Connections
-            if 'connections' in self.results:
-                f.write(f"🔌 DATA CONNECTIONS: {len(self.results['connections'])}\n")
-                f.write("-" * 80 + "\n")
-                for conn in self.results['connections']:
-                    f.write(f"  • {conn['name']} ({conn.get('connectionType', 'N/A')})\n")
-                f.write("\n")
-            
-            # Custom Visuals
-            if 'customVisuals' in self.results:
-                f.write(f"🎨 CUSTOM VISUALS: {len(self.results['customVisuals'])}\n")
-                f.write("-" * 80 + "\n")
-                for visual in self.results['customVisuals']:
-                    f.write(f"  • {visual['name']}\n")
-                f.write("\n")
-            
-            # Version
-            if 'version' in self.results:
-                f.write(f"🔢 VERSION: {self.results['version']}\n\n")
-            
-            f.write("=" * 80 + "\n")
+        buf = io.StringIO()
+        w = buf.write
+        w(_EQ80)
+        w("POWER BI FILE - SUMMARY REPORT\n")
+        w(_EQ80)
+        w(f"File: {self.file_path}\n")
+        w(f"Generated: {self._timestamp}\n")
+        w(_EQ80 + "\n")
+        
+        # Report Pages
+        if rl is not None:
+            pages = rl.get('pages', [])
+            w(f"📄 REPORT PAGES: {len(pages)}\n")
+            w(_DASH80)
+            for page in pages:
+                w(f"  • {page['displayName']}\n")
+                w(f"    Visuals: {len(page['visualContainers'])}\n")
+            w("\n")
+        
+        # Data Model
+        if dm is not None:
+            summary = dm.get('summary', {})
+            
+            tables, measures, calc_columns, calc_tables, relationships, roles = [
+                summary.get(key, 0) for key in _SUMMARY_KEYS]
+            
+            w(f"🗄️  DATA MODEL\n")
+            w(_DASH80)
+            w(f"  Tables: {tables}\n"
+              f"  Measures: {measures}\n"
+              f"  Calculated Columns: {calc_columns}\n"
+              f"  Calculated Tables: {calc_tables}\n"
+              f"  Relationships: {relationships}\n"
+              f"  Security Roles: {roles}\n\n")
+        
+        # Connections
+        if 'connections' in results:
+            w(f"🔌 DATA CONNECTIONS: {len(results['connections'])}\n")
+            w(_DASH80)
+            for conn in results['connections']:
+                w(f"  • {conn['name']} ({conn.get('connectionType', 'N/A')})\n")
+            w("\n")
         
-        print(f"💾 Saved summary report: {output_file}")
+        # Custom Visuals
+        if 'customVisuals' in results:
+            w(f"🎨 CUSTOM VISUALS: {len(results['customVisuals'])}\n")
+            w(_DASH80)
+            for visual in results['customVisuals']:
+                w(f"  • {visual['name']}\n")
+            w("\n")
+        
+        # Version
+        if 'version' in results:
+            w(f"🔢 VERSION: {results['version']}\n\n")
+        
+        w(_EQ80)
+        
+        _write_text_file(output_file, buf.getvalue())
+        
+        log(f"💾 Saved summary report: {output_file}")
     
-    def _generate_detailed_report(self):
+    def _generate_detailed_report(self, log=print):
         """Generate a detailed report with all information."""
-        output_file = os.path.join(self.output_dir, 'detailed_report.txt')
+        output_file = self._paths['detailed']
+        results = self.results
+        rl = results.get('reportLayout')
+        dm = results.get('dataModel')
         
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write("=" * 80 + "\n")
-            f.write("POWER BI FILE - DETAILED ANALYSIS REPORT\n")
-            f.write("=" * 80 + "\n")
-            f.write(f"File: {self.file_path}\n")
-            f.write(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write("=" * 80 + "\n\n")
-            
-            # REPORT PAGES
-            if 'reportLayout' in self.results:
-                f.write("\n" + "=" * 80 + "\n")
-                f.write("📄 REPORT PAGES\n")
-                f.write("=" * 80 + "\n\n")
+        buf = io.StringIO()
+        w = buf.write
+        w(_EQ80)
+        w("POWER BI FILE - DETAILED ANALYSIS REPORT\n")
+        w(_EQ80)
+        w(f"File: {self.file_path}\n")
+        w(f"Generated: {self._timestamp}\n")
+        w(_EQ80 + "\n")
+        
+        # REPORT PAGES
+        if rl is not None:
+            w("\n" + _EQ80)
+            w("📄 REPORT PAGES\n")
+            w(_EQ80 + "\n")
+            
+            for page in rl.get('pages', []):
+                w(f"PAGE: {page['displayName']}\n")
+                w(_DASH80)
+                w(f"Dimensions: {page['width']} x {page['height']}\n")
+                w(f"Visuals: {len(page['visualContainers'])}\n\n")
                 
-                for page in self.results['reportLayout'].get('pages', []):
-                    f.write(f"PAGE: {page['displayName']}\n")
-                    f.write("-" * 80 + "\n")
-                    f.write(f"Dimensions: {page['width']} x {page['height']}\n")
-                    f.write(f"Visuals: {len(page['visualContainers'])}\n\n")
-                    
-                    # Visual breakdown
-                    visual_types = {}
-                    for visual in page['visualContainers']:
-                        vtype = visual['type']
-                        visual_types[vtype] = visual_types.get(vtype, 0) + 1
-                    
-                    f.write("Visual Types:\n")
-                    for vtype, count in sorted(visual_types.items()):
-                        f.write(f"  • {vtype}: {count}\n")
-                    
-                    f.write("\nVisual Details:\n")
-                    for i, visual in enumerate(page['visualContainers'], 1):
-                        f.write(f"  [{i}] {visual['type']}\n")
-                        if visual.get('title'):
-                            f.write(f"      Title: {visual['title']}\n")
-                        f.write(f"      Position: ({visual['x']}, {visual['y']})\n")
-                        f.write(f"      Size: {visual['width']} x {visual['height']}\n")
-                    
-                    f.write("\n")
-            
-            # DATA MODEL
-            if 'dataModel' in self.results:
-                f.write("\n" + "=" * 80 + "\n")
-                f.write("🗄️  DATA MODEL\n")
-                f.write("=" * 80 + "\n\n")
+                # Visual breakdown and details in one pass; the details are
+                # written after the breakdown
+                visual_types = Counter()
+                details = []
+                add_detail = details.append
+                for i, visual in enumerate(page['visualContainers'], 1):
+                    vtype, x, y, width, height = _VISUAL_FIELDS(visual)
+                    visual_types[vtype] += 1
+                    add_detail(f"  [{i}] {vtype}\n")
+                    title = visual.get('title')
+                    if title:
+                        add_detail(f"      Title: {title}\n")
+                    add_detail(f"      Position: ({x}, {y})\n      Size: {width} x {height}\n")
                 
-                # Tables
-                for table in self.results['dataModel'].get('tables', []):
-                    hidden = " [HIDDEN]" if table.get('isHidden') else ""
-                    f.write(f"TABLE: {table['name']}{hidden}\n")
-                    f.write("-" * 80 + "\n")
-                    
-                    if table.get('description'):
-                        f.write(f"Description: {table['description']}\n")
-                    
-                    f.write(f"\nColumns ({len(table['columns'])}):\n")
-                    for col in table['columns']:
-                        hidden_col = " [HIDDEN]" if col.get('isHidden') else ""
-                        calc = " [CALCULATED]" if col.get('expression') else ""
-                        f.write(f"  • {col['name']}{hidden_col}{calc}\n")
-                        f.write(f"    Type: {col.get('dataType', 'N/A')}\n")
-                        if col.get('formatString'):
-                            f.write(f"    Format: {col['formatString']}\n")
-                        if col.get('expression'):
-                            f.write(f"    Expression: {col['expression']}\n")
-                    
-                    if table['measures']:
-                        f.write(f"\nMeasures ({len(table['measures'])}):\n")
-                        for measure in table['measures']:
-                            hidden_meas = " [HIDDEN]" if measure.get('isHidden') else ""
-                            f.write(f"  • {measure['name']}{hidden_meas}\n")
-                            if measure.get('displayFolder'):
-                                f.write(f"    Folder: {measure['displayFolder']}\n")
-                            
-                            # ========== FIX: USE SAFE EXPRESSION GETTER ==========
-                            expr = self._safe_get_expression(measure, 'expression')
-                            if expr:
-                                expr = expr.replace('\n', '\n    ')
-                                f.write(f"    DAX: {expr}\n")
-                            # =====================================================
-                            
-                            if measure.get('formatString'):
-                                f.write(f"    Format: {measure['formatString']}\n")
-                    
-                    if table['hierarchies']:
-                        f.write(f"\nHierarchies ({len(table['hierarchies'])}):\n")
-                        for hier in table['hierarchies']:
-                            f.write(f"  • {hier['name']}\n")
-                            for level in hier['levels']:
-                                f.write(f"    → {level['name']} ({level['column']})\n")
-                    
-                    f.write("\n")
+                w("Visual Types:\n")
+                for vtype, count in sorted(visual_types.items()):
+                    w(f"  • {vtype}: {count}\n")
                 
-                # Relationships
-                if self.results['dataModel'].get('relationships'):
-                    f.write("\n" + "-" * 80 + "\n")
-                    f.write("RELATIONSHIPS\n")
-                    f.write("-" * 80 + "\n")
-                    for rel in self.results['dataModel']['relationships']:
-                        active = "✓" if rel.get('isActive', True) else "✗"
-                        f.write(f"{active} {rel['fromTable']}[{rel['fromColumn']}] → ")
-                        f.write(f"{rel['toTable']}[{rel['toColumn']}]\n")
-                        f.write(f"   Cardinality: {rel.get('fromCardinality', 'N/A')} to ")
-                        f.write(f"{rel.get('toCardinality', 'N/A')}\n")
-                        f.write(f"   Cross-filtering: {rel.get('crossFilteringBehavior', 'N/A')}\n\n")
+                w("\nVisual Details:\n")
+                w(''.join(details))
                 
-                # Security Roles
-                if self.results['dataModel'].get('roles'):
-                    f.write("\n" + "-" * 80 + "\n")
-                    f.write("SECURITY ROLES (RLS)\n")
-                    f.write("-" * 80 + "\n")
-                    for role in self.results['dataModel']['roles']:
-                        f.write(f"ROLE: {role['name']}\n")
-                        if role.get('description'):
-                            f.write(f"Description: {role['description']}\n")
-                        f.write(f"Permissions:\n")
-                        for perm in role.get('tablePermissions', []):
-                            f.write(f"  • Table: {perm['name']}\n")
-                            
-                            # ========== FIX: USE SAFE EXPRESSION GETTER ==========
-                            expr = self._safe_get_expression(perm, 'filterExpression')
-                            if expr:
-                                expr = expr.replace('\n', '\n    ')
-                                f.write(f"    Filter: {expr}\n")
-                            # =====================================================
-                        f.write("\n")
-            
-            # CONNECTIONS
-            if 'connections' in self.results:
-                f.write("\n" + "=" * 80 + "\n")
-                f.write("🔌 DATA CONNECTIONS\n")
-                f.write("=" * 80 + "\n\n")
-                for conn in self.results['connections']:
-                    f.write(f"CONNECTION: {conn['name']}\n")
-                    f.write("-" * 80 + "\n")
-                    f.write(f"Type: {conn.get('connectionType', 'N/A')}\n")
-                    if conn.get('connectionString'):
-                        f.write(f"Connection String: {conn['connectionString']}\n")
-                    f.write("\n")
-            
-            f.write("\n" + "=" * 80 + "\n")
+                w("\n")
         
-        print(f"💾 Saved detailed report: {output_file}")
+        # DATA MODEL
+        if dm is not None:
+            w("\n" + _EQ80)
+            w("🗄️  DATA MODEL\n")
+            w(_EQ80 + "\n")
+            
+            # Tables
+            for table in dm.get('tables', []):
+                hidden = " [HIDDEN]" if table.get('isHidden') else ""
+                w(f"TABLE: {table['name']}{hidden}\n")
+                w(_DASH80)
+                
+                if table.get('description'):
+                    w(f"Description: {table['description']}\n")
+                
+                w(f"\nColumns ({len(table['columns'])}):\n")
+                for col in table['columns']:
+                    # Every parsed column carries these keys, so read each one once
+                    expression = col['expression']
+                    format_string = col['formatString']
+                    if not (expression or format_string or col['isHidden']):
+                        # Plain column (the common case): name and type only
+                        w(f"  • {col['name']}\n    Type: {col['dataType']}\n")
+                        continue
+                    hidden_col = " [HIDDEN]" if col['isHidden'] else ""
+                    calc = " [CALCULATED]" if expression else ""
+                    w(f"  • {col['name']}{hidden_col}{calc}\n    Type: {col['dataType']}\n")
+                    if format_string:
+                        w(f"    Format: {format_string}\n")
+                    if expression:
+                        w(f"    Expression: {expression}\n")
+                
+                if table['measures']:
+                    w(f"\nMeasures ({len(table['measures'])}):\n")
+                    for measure in table['measures']:
+                        hidden_meas = " [HIDDEN]" if measure.get('isHidden') else ""
+                        w(f"  • {measure['name']}{hidden_meas}\n")
+                        if measure.get('displayFolder'):
+                            w(f"    Folder: {measure['displayFolder']}\n")
+                        
+                        # ========== FIX: USE SAFE EXPRESSION GETTER ==========
+                        expr = self._safe_get_expression(measure, 'expression',
+                                                         (table['name'], measure['name']))
+                        if expr:
+                            expr = expr.replace('\n', '\n    ')
+                            w(f"    DAX: {expr}\n")
+                        # =====================================================
+                        
+                        if measure.get('formatString'):
+                            w(f"    Format: {measure['formatString']}\n")
+                
+                if table['hierarchies']:
+                    w(f"\nHierarchies ({len(table['hierarchies'])}):\n")
+                    for hier in table['hierarchies']:
+                        w(f"  • {hier['name']}\n")
+                        for level in hier['levels']:
+                            w(f"    → {level['name']} ({level['column']})\n")
+                
+                w("\n")
+            
+            # Relationships
+            if dm.get('relationships'):
+                w("\n" + _DASH80)
+                w("RELATIONSHIPS\n")
+                w(_DASH80)
+                for rel in dm['relationships']:
+                    active = "✓" if rel.get('isActive', True) else "✗"
+                    w(f"{active} {rel['fromTable']}[{rel['fromColumn']}] → {rel['toTable']}[{rel['toColumn']}]\n"
+                      f"   Cardinality: {rel.get('fromCardinality', 'N/A')} to {rel.get('toCardinality', 'N/A')}\n"
+                      f"   Cross-filtering: {rel.get('crossFilteringBehavior', 'N/A')}\n\n")
+            
+            # Security Roles
+            if dm.get('roles'):
+                w("\n" + _DASH80)
+                w("SECURITY ROLES (RLS)\n")
+                w(_DASH80)
+                for role in dm['roles']:
+                    w(f"ROLE: {role['name']}\n")
+                    if role.get('description'):
+                        w(f"Description: {role['description']}\n")
+                    w(f"Permissions:\n")
+                    for perm in role.get('tablePermissions', []):
+                        w(f"  • Table: {perm['name']}\n")
+                        
+                        # ========== FIX: USE SAFE EXPRESSION GETTER ==========
+                        expr = self._safe_get_expression(perm, 'filterExpression')
+                        if expr:
+                            expr = expr.replace('\n', '\n    ')
+                            w(f"    Filter: {expr}\n")
+                        # =====================================================
+                    w("\n")
+        
+        # CONNECTIONS
+        if 'connections' in results:
+            w("\n" + _EQ80)
+            w("🔌 DATA CONNECTIONS\n")
+            w(_EQ80 + "\n")
+            for conn in results['connections']:
+                w(f"CONNECTION: {conn['name']}\n")
+                w(_DASH80)
+                w(f"Type: {conn.get('connectionType', 'N/A')}\n")
+                if conn.get('connectionString'):
+                    w(f"Connection String: {conn['connectionString']}\n")
+                w("\n")
+        
+        w("\n" + _EQ80)
+        
+        _write_text_file(output_file, buf.getvalue())
+        
+        log(f"💾 Saved detailed report: {output_file}")
     
-    def _generate_measures_report(self):
+    def _generate_measures_report(self, log=print):
         """Generate a dedicated report for all measures."""
-        if 'dataModel' not in self.results:
+        dm = self.results.get('dataModel')
+        if dm is None:
             return
         
-        output_file = os.path.join(self.output_dir, 'measures_report.txt')
+        output_file = self._paths['measures']
         
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write("=" * 80 + "\n")
-            f.write("ALL DAX MEASURES\n")
-            f.write("=" * 80 + "\n\n")
-            
-            all_measures = self.results['dataModel'].get('summary', {}).get('allMeasures', [])
-            
-            # Group by display folder
-            by_folder = {}
-            for measure in all_measures:
-                folder = measure.get('displayFolder', '(Root)')
-                if folder not in by_folder:
-                    by_folder[folder] = []
-                by_folder[folder].append(measure)
+        buf = io.StringIO()
+        w = buf.write
+        w(_EQ80)
+        w("ALL DAX MEASURES\n")
+        w(_EQ80 + "\n")
+        
+        all_measures = dm.get('summary', {}).get('allMeasures', [])
+        
+        # Group by display folder
+        by_folder = defaultdict(list)
+        for measure in all_measures:
+            by_folder[measure.get('displayFolder', '(Root)')].append(measure)
+        
+        for folder in sorted(by_folder.keys()):
+            w(f"\n📁 {folder}\n")
+            w(_DASH80)
             
-            for folder in sorted(by_folder.keys()):
-                f.write(f"\n📁 {folder}\n")
-                f.write("-" * 80 + "\n")
+            for measure in by_folder[folder]:
+                w(f"\n{measure['table']}[{measure['measure']}]\n")
                 
-                for measure in by_folder[folder]:
-                    f.write(f"\n{measure['table']}[{measure['measure']}]\n")
-                    
-                    # ========== FIX: USE SAFE EXPRESSION GETTER ==========
-                    expr = self._safe_get_expression(measure, 'expression')
-                    if expr:
-                        expr = expr.strip()
-                        f.write(f"{expr}\n")
-                    # =====================================================
-                    f.write("\n")
+                # ========== FIX: USE SAFE EXPRESSION GETTER ==========
+                expr = self._safe_get_expression(measure, 'expression',
+                                                 (measure['table'], measure['measure']))
+                if expr:
+                    expr = expr.strip()
+                    w(f"{expr}\n")
+                # =====================================================
+                w("\n")
+        
+        _write_text_file(output_file, buf.getvalue())
         
-        print(f"💾 Saved measures report: {output_file}")
+        log(f"💾 Saved measures report: {output_file}")
     
-    def _generate_relationships_diagram(self):
+    def _generate_relationships_diagram(self, log=print):
         """Generate a text-based relationships diagram."""
-        if 'dataModel' not in self.results:
+        dm = self.results.get('dataModel')
+        if dm is None:
             return
         
-        output_file = os.path.join(self.output_dir, 'relationships_diagram.txt')
+        output_file = self._paths['relationships']
         
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write("=" * 80 + "\n")
-            f.write("DATA MODEL RELATIONSHIPS\n")
-            f.write("=" * 80 + "\n\n")
-            
-            # Group relationships by from table
-            by_table = {}
-            for rel in self.results['dataModel'].get('relationships', []):
-                from_table = rel['fromTable']
-                if from_table not in by_table:
-                    by_table[from_table] = []
-                by_table[from_table].append(rel)
-            
-            for table in sorted(by_table.keys()):
-                f.write(f"\n{table}\n")
-                for rel in by_table[table]:
-                    active = "━━" if rel.get('isActive', True) else "┄┄"
-                    cardinality = f"{rel.get('fromCardinality', '?')}:{rel.get('toCardinality', '?')}"
-                    f.write(f"  [{rel['fromColumn']}] {active}({cardinality}){active}> ")
-                    f.write(f"{rel['toTable']}[{rel['toColumn']}]\n")
-                f.write("\n")
+        buf = io.StringIO()
+        w = buf.write
+        w(_EQ80)
+        w("DATA MODEL RELATIONSHIPS\n")
+        w(_EQ80 + "\n")
+        
+        # Group relationships by from table (the sort is stable, so each
+        # table keeps its relationships in model order)
+        from_table = itemgetter('fromTable')
+        for table, rels in groupby(sorted(dm.get('relationships', []), key=from_table), key=from_table):
+            w(f"\n{table}\n")
+            for rel in rels:
+                active = "━━" if rel.get('isActive', True) else "┄┄"
+                cardinality = f"{rel.get('fromCardinality', '?')}:{rel.get('toCardinality', '?')}"
+                w(f"  [{rel['fromColumn']}] {active}({cardinality}){active}> {rel['toTable']}[{rel['toColumn']}]\n")
+            w("\n")
         
-        print(f"💾 Saved relationships diagram: {output_file}")
+        _write_text_file(output_file, buf.getvalue())
+        
+        log(f"💾 Saved relationships diagram: {output_file}")
     
     def _print_summary(self):
         """Print summary to console."""
-        print(f"\n📊 ANALYSIS SUMMARY:")
-        print("-" * 80)
+        results = self.results
+        rl = results.get('reportLayout')
+        dm = results.get('dataModel')
+        # Collect the lines and write them to the console in one go
+        lines = []
+        add = lines.append
+        
+        add(f"\n📊 ANALYSIS SUMMARY:")
+        add("-" * 80)
         
-        if 'reportLayout' in self.results:
-            pages = len(self.results['reportLayout'].get('pages', []))
-            visuals = sum(len(p['visualContainers']) for p in self.results['reportLayout'].get('pages', []))
-            print(f"Report Pages: {pages}")
-            print(f"Total Visuals: {visuals}")
+        if rl is not None:
+            pages = rl.get('pages', [])
+            visuals = sum(len(p['visualContainers']) for p in pages)
+            add(f"Report Pages: {len(pages)}")
+            add(f"Total Visuals: {visuals}")
         
-        if 'dataModel' in self.results:
-            summary = self.results['dataModel'].get('summary', {})
-            print(f"Tables: {summary.get('totalTables', 0)}")
-            print(f"Measures: {summary.get('totalMeasures', 0)}")
-            print(f"Relationships: {summary.get('totalRelationships', 0)}")
-            print(f"Calculated Columns: {summary.get('totalCalculatedColumns', 0)}")
-            print(f"Calculated Tables: {summary.get('totalCalculatedTables', 0)}")
+        if dm is not None:
+            summary = dm.get('summary', {})
+            add(f"Tables: {summary.get('totalTables', 0)}")
+            add(f"Measures: {summary.get('totalMeasures', 0)}")
+            add(f"Relationships: {summary.get('totalRelationships', 0)}")
+            add(f"Calculated Columns: {summary.get('totalCalculatedColumns', 0)}")
+            add(f"Calculated Tables: {summary.get('totalCalculatedTables', 0)}")
             if summary.get('totalRoles', 0) > 0:
-                print(f"Security Roles: {summary.get('totalRoles', 0)}")
+                add(f"Security Roles: {summary.get('totalRoles', 0)}")
+        
+        if 'connections' in results:
+            add(f"Data Connections: {len(results['connections'])}")
         
-        if 'connections' in self.results:
-            print(f"Data Connections: {len(self.results['connections'])}")
+        if 'customVisuals' in results:
+            add(f"Custom Visuals: {len(results['customVisuals'])}")
         
-        if 'customVisuals' in self.results:
-            print(f"Custom Visuals: {len(self.results['customVisuals'])}")
+        if 'version' in results:
+            add(f"Power BI Version: {results['version']}")
         
-        if 'version' in self.results:
-            print(f"Power BI Version: {self.results['version']}")
+        add("\n📁 OUTPUT FILES:")
+        add("-" * 80)
+        for name, path in self._paths.items():
+            if name in self.report_formats:
+                add(f"  • {path}")
+        if self.keep_extracted:
+            add(f"  • {os.path.join(self.extract_dir, '...')} (raw files)")
         
-        print("\n📁 OUTPUT FILES:")
-        print("-" * 80)
-        print(f"  • {os.path.join(self.output_dir, 'complete_analysis.json')}")
-        print(f"  • {os.path.join(self.output_dir, 'summary_report.txt')}")
-        print(f"  • {os.path.join(self.output_dir, 'detailed_report.txt')}")
-        print(f"  • {os.path.join(self.output_dir, 'measures_report.txt')}")
-        print(f"  • {os.path.join(self.output_dir, 'relationships_diagram.txt')}")
-        print(f"  • {os.path.join(self.output_dir, 'extracted', '...')} (raw files)")
+        sys.stdout.write('\n'.join(lines) + '\n')
 
 
 # =============================================================================
@@ -998,28 +1236,47 @@ class PBIXParser:
 # =============================================================================
 
 if __name__ == '__main__':
-    import sys
+    import argparse
     
-    # Check if file path provided
-    if len(sys.argv) > 1:
-        pbix_file = sys.argv[1]
-    else:
-        # Default file name - change this to your PBIX/PBIT file
-        pbix_file = 'your_report.pbit'
+    arg_parser = argparse.ArgumentParser(description='Extract everything possible from a PBIX/PBIT file.')
+    # Default file name - change this to your PBIX/PBIT file
+    arg_parser.add_argument('pbix_file', nargs='?', default='your_report.pbit',
+                            help='path to the PBIX or PBIT file')
+    arg_parser.add_argument('--keep-extracted', action='store_true',
+                            help='also write the raw archive members to <output>/extracted')
+    arg_parser.add_argument('--include-raw', action='store_true',
+                            help='keep the full parsed visual configs in complete_analysis.json')
+    arg_parser.add_argument('--compact-json', action='store_true',
+                            help='write complete_analysis.json without indentation')
+    arg_parser.add_argument('--keep-annotations', action='store_true',
+                            help='keep model annotations and lineage tags in complete_analysis.json')
+    arg_parser.add_argument('--formats', default=','.join(_REPORT_FORMATS),
+                            help=f"comma-separated outputs to write (default: {','.join(_REPORT_FORMATS)})")
+    arg_parser.add_argument('--debug', action='store_true',
+                            help='print the full traceback on failure (or set PBIX_DEBUG=1)')
+    args = arg_parser.parse_args()
+    report_formats = {name.strip() for name in args.formats.split(',') if name.strip()}
+    unknown = report_formats.difference(_REPORT_FORMATS)
+    if unknown:
+        arg_parser.error(f"unknown format(s): {', '.join(sorted(unknown))}")
+    pbix_file = args.pbix_file
     
     # Check if file exists
     if not os.path.exists(pbix_file):
         print(f"❌ Error: File not found: {pbix_file}")
-        print(f"\nUsage: python {sys.argv[0]} <path_to_pbix_or_pbit_file>")
+        print(f"\nUsage: python {sys.argv[0]} <path_to_pbix_or_pbit_file> [--keep-extracted] [--include-raw] [--compact-json] [--keep-annotations] [--formats json,summary,...] [--debug]")
         print(f"   Or: Edit the script and change 'your_report.pbit' to your file name")
         sys.exit(1)
     
     # Parse the file
-    parser = PBIXParser(pbix_file)
+    parser = PBIXParser(pbix_file, keep_extracted=args.keep_extracted, include_raw=args.include_raw,
+                        pretty_json=not args.compact_json, keep_annotations=args.keep_annotations,
+                        report_formats=report_formats)
     try:
         results = parser.parse()
     except Exception as e:
         print(f"\n❌ Fatal error: {e}")
-        import traceback
-        traceback.print_exc()
+        if args.debug or os.environ.get('PBIX_DEBUG'):
+            import traceback
+            traceback.print_exc()
         sys.exit(1)
\ No newline at end of file